@@ -0,0 +1,157 @@
+# file: adjustment_stack.py
+import threading
+from collections import OrderedDict
+from typing import Callable, Collection, Optional, Tuple
+
+from PIL import Image
+
+from render_cache import RenderCache
+
+# Uma etapa é (nome do filtro, parâmetros como tupla ordenada de pares)
+Stage = Tuple[str, Tuple[Tuple[str, object], ...]]
+
+
+def make_stage(name: str, **params) -> Stage:
+    """Cria uma etapa imutável (e utilizável como chave de cache)."""
+    return name, tuple(sorted(params.items()))
+
+
+class AdjustmentStack:
+    """
+    Pilha não destrutiva de ajustes sobre uma imagem base imutável.
+
+    A imagem final é a base com as etapas (filtro, parâmetros) aplicadas em
+    ordem. O resultado de cada prefixo de etapas fica em cache: mudar uma
+    etapa recalcula só ela e as seguintes, sempre a partir do resultado da
+    etapa anterior, e nunca sobre uma saída que já continha a própria etapa.
+
+    Etapas consecutivas que podem ser compiladas juntas (ex.: brilho,
+    contraste e saturação em uma tabela de cores) são avaliadas em uma única
+    passada pela função fused.
+
+    O cache de prefixos é um LRU limitado por memória (como o RenderCache):
+    em imagens grandes, cada resultado intermediário ocupa o tamanho da
+    imagem inteira.
+    """
+
+    def __init__(self, base: Image.Image, max_cached: int = 16, fusable: Collection[str] = (),
+                 fused: Optional[Callable[[Image.Image, list], Image.Image]] = None,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            base: Imagem original (não é alterada)
+            max_cached: Número máximo de resultados intermediários mantidos
+            fusable: Nomes dos filtros que podem ser avaliados juntos
+            fused: Aplica um grupo de etapas: fused(imagem, [(nome, parâmetros), ...])
+            max_bytes: Orçamento de memória dos resultados intermediários em bytes
+        """
+        self.base = base
+        self.max_cached = max_cached
+        self.max_bytes = max_bytes
+        self.fusable = frozenset(fusable) if fused is not None else frozenset()
+        self.fused = fused
+        self._stages = ()
+        self._cache = OrderedDict()  # prefixo de etapas -> (imagem, tamanho em bytes)
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+        # Estatísticas
+        self.stages_computed = 0
+        self.stages_reused = 0
+
+    @property
+    def stages(self) -> Tuple[Stage, ...]:
+        return self._stages
+
+    def with_stage(self, name: str, **params) -> Tuple[Stage, ...]:
+        """Etapas resultantes de definir os parâmetros de um filtro, sem alterar a pilha."""
+        stage = make_stage(name, **params)
+        stages = list(self._stages)
+        for i, (stage_name, _) in enumerate(stages):
+            if stage_name == name:
+                stages[i] = stage
+                return tuple(stages)
+        return tuple(stages) + (stage,)
+
+    def set_stage(self, name: str, **params):
+        """Define os parâmetros de um filtro (substitui a etapa existente ou adiciona uma nova)."""
+        self._stages = self.with_stage(name, **params)
+
+    def remove_stage(self, name: str):
+        """Remove a etapa de um filtro."""
+        self._stages = tuple(stage for stage in self._stages if stage[0] != name)
+
+    def rebase(self, base: Image.Image) -> "AdjustmentStack":
+        """Cria uma pilha com as mesmas etapas sobre outra base (ex.: uma prévia reduzida)."""
+        stack = AdjustmentStack(base, self.max_cached, self.fusable, self.fused, self.max_bytes)
+        stack._stages = self._stages
+        return stack
+
+    def render(self, apply: Callable[[str, Image.Image, dict], Image.Image],
+               stages: Optional[Tuple[Stage, ...]] = None, token=None) -> Image.Image:
+        """
+        Calcula a imagem final, reaproveitando o maior prefixo de etapas já calculado.
+
+        Pode rodar fora da thread principal.
+
+        Args:
+            apply: Aplica um filtro: apply(nome, imagem, parâmetros) -> imagem
+            stages: Etapas a calcular (padrão: as da pilha)
+            token: Token de cancelamento verificado entre as etapas (opcional)
+
+        Returns:
+            Image.Image: Imagem com todas as etapas aplicadas
+        """
+        if stages is None:
+            stages = self._stages
+        image, start = self.base, 0
+        with self._lock:
+            for end in range(len(stages), 0, -1):
+                cached = self._cache.get(stages[:end])
+                if cached is not None:
+                    self._cache.move_to_end(stages[:end])
+                    image, start = cached[0], end
+                    break
+            self.stages_reused += start
+
+        i = start
+        while i < len(stages):
+            if token is not None:
+                token.check()
+            end = i + 1
+            while end < len(stages) and stages[i][0] in self.fusable and stages[end][0] in self.fusable:
+                end += 1
+            if end - i > 1:
+                # Uma única passada para o grupo inteiro
+                image = self.fused(image, [(name, dict(params)) for name, params in stages[i:end]])
+            else:
+                name, params = stages[i]
+                image = apply(name, image, dict(params))
+            self.stages_computed += end - i
+            i = end
+            with self._lock:
+                self._store(stages[:end], image)
+        return image
+
+    def _store(self, prefix: Tuple[Stage, ...], image: Image.Image):
+        """Guarda um resultado intermediário, descartando os menos usados até caber no orçamento."""
+        size = RenderCache.estimate_size(image)
+        if size > self.max_bytes:
+            return
+        if prefix in self._cache:
+            self._cache_bytes -= self._cache.pop(prefix)[1]
+        self._cache[prefix] = (image, size)
+        self._cache_bytes += size
+        while len(self._cache) > self.max_cached or self._cache_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_size
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas da pilha."""
+        return {
+            "stages": len(self._stages),
+            "cached": len(self._cache),
+            "bytes": self._cache_bytes,
+            "computed": self.stages_computed,
+            "reused": self.stages_reused,
+        }
@@ -0,0 +1,285 @@
+# file: animation_frames.py
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+class CompactFrameStore:
+    """
+    Armazenamento compacto dos quadros de uma animação.
+
+    Cada quadro é guardado no seu modo nativo (normalmente 'P', com a paleta
+    compartilhada) e apenas o retângulo que mudou em relação ao quadro
+    anterior é mantido, junto com a duração e o método de descarte. Quadros
+    que o Pillow entrega em RGB (o padrão dele para os quadros após o
+    primeiro, e os de paleta local no arquivo) voltam para a paleta
+    compartilhada quando todas as suas cores estão nela. Quadros completos são
+    guardados a intervalos fixos e sempre que o modo ou a paleta mudam; um
+    quadro é reconstruído sob demanda a partir do quadro completo mais
+    próximo, aplicando os retângulos seguintes.
+    """
+
+    def __init__(self, keyframe_interval: int = 32):
+        """
+        Args:
+            keyframe_interval: Guarda um quadro completo a cada N quadros
+        """
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._entries = []  # (caixa ou None, dados, duração, descarte, modo)
+        self._keyframes = []  # índices com quadro completo, em ordem
+        self._last = None  # último quadro adicionado, completo (para a diferença)
+        self._cursor = None  # (índice, quadro) da última reconstrução
+        self._palette = None  # paleta compartilhada (do primeiro quadro 'P')
+        self._palette_keys = None  # cores RGB da paleta (ordenadas) e seus índices
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, frame: Image.Image, duration: int, disposal: int = 0):
+        """
+        Adiciona o próximo quadro (já composto sobre os anteriores).
+
+        Args:
+            frame: Quadro completo, como exibido
+            duration: Duração do quadro em ms
+            disposal: Método de descarte do GIF (apenas informativo)
+        """
+        index = len(self._entries)
+        last = self._last
+        if self._palette is None and frame.mode == "P" and "transparency" not in frame.info:
+            self._set_palette(frame.getpalette())
+        full = (
+            last is None
+            or index % self.keyframe_interval == 0
+            or frame.mode != last.mode
+            or frame.size != last.size
+            or frame.info.get("transparency") != last.info.get("transparency")
+            or (frame.mode == "P" and frame.getpalette() != last.getpalette())
+        )
+        if full:
+            box, data = None, self._to_palette(frame.copy())
+            self._keyframes.append(index)
+        else:
+            box = self._changed_box(last, frame)
+            data = self._to_palette(frame.crop(box)) if box is not None else None
+        self._entries.append((box, data, duration, disposal, frame.mode))
+        if data is not None:
+            self.nbytes += len(data.getbands()) * data.width * data.height
+        self._last = frame
+
+    def get_duration(self, index: int) -> int:
+        return self._entries[index][2]
+
+    def get_disposal(self, index: int) -> int:
+        return self._entries[index][3]
+
+    def nearest_keyframe(self, index: int) -> int:
+        """Índice do quadro completo mais próximo em ou antes de index."""
+        keyframes = self._keyframes
+        lo, hi = 0, len(keyframes) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if keyframes[mid] <= index:
+                lo = mid
+            else:
+                hi = mid - 1
+        return keyframes[lo]
+
+    def expand(self, index: int) -> Image.Image:
+        """Reconstrói o quadro completo de índice index."""
+        cursor = self._cursor
+        if cursor is not None and cursor[0] <= index and index - cursor[0] < self.keyframe_interval:
+            # Reprodução sequencial: continua a partir da última reconstrução
+            start, frame = cursor
+            frame = frame.copy()
+        else:
+            start = self.nearest_keyframe(index)
+            frame = self._restore_mode(self._entries[start][1], self._entries[start][4])
+        for i in range(start + 1, index + 1):
+            box, data, _, _, mode = self._entries[i]
+            if box is None and data is not None:
+                frame = self._restore_mode(data, mode)
+            elif data is not None:
+                # paste() converte dados 'P' para o modo do quadro sem perdas
+                frame.paste(data, box[:2])
+        self._cursor = (index, frame)
+        return frame.copy()
+
+    def _set_palette(self, palette):
+        colors = np.array(palette[:768], dtype=np.uint32).reshape(-1, 3)
+        keys = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        # Para cores repetidas na paleta, fica o primeiro índice
+        unique_keys, first_index = np.unique(keys, return_index=True)
+        self._palette = palette
+        self._palette_keys = (unique_keys, first_index.astype(np.uint8))
+
+    def _to_palette(self, image: Image.Image) -> Image.Image:
+        """Converte um recorte RGB para a paleta compartilhada, se não houver perda."""
+        if self._palette is None or image.mode != "RGB":
+            return image
+        colors = image.getcolors(256)
+        if colors is None:
+            return image
+        unique_keys, indexes = self._palette_keys
+        color_keys = np.array([(r << 16) | (g << 8) | b for _, (r, g, b) in colors], dtype=np.uint32)
+        if not np.isin(color_keys, unique_keys).all():
+            return image
+        rgb = np.asarray(image, dtype=np.uint32)
+        keys = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+        paletted = Image.frombytes("P", image.size, indexes[np.searchsorted(unique_keys, keys)].tobytes())
+        paletted.putpalette(self._palette)
+        return paletted
+
+    @staticmethod
+    def _restore_mode(data: Image.Image, mode: str) -> Image.Image:
+        return data.convert(mode) if data.mode != mode else data.copy()
+
+    @staticmethod
+    def _changed_box(previous: Image.Image, frame: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """Menor retângulo que contém todos os pixels diferentes entre dois quadros."""
+        changed = np.asarray(previous) != np.asarray(frame)
+        if changed.ndim == 3:
+            changed = changed.any(axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size == 0:
+            return None
+        cols = np.flatnonzero(changed.any(axis=0))
+        return (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+
+class LazyFrameSource:
+    """
+    Fonte de quadros de uma animação (GIF/WebP/APNG) decodificados sob demanda.
+
+    Uma thread de fundo decodifica os quadros à frente da posição de
+    reprodução. Cada quadro decodificado vai para um CompactFrameStore (só o
+    retângulo alterado, no modo nativo), e apenas uma janela limitada de
+    quadros completos é mantida em memória. Os quadros completos do store
+    servem de pontos de partida para acesso aleatório. O tempo até o primeiro
+    quadro e o pico de memória não dependem do número de quadros.
+    """
+
+    def __init__(self, path: str, window: int = 32, keyframe_interval: int = 32):
+        """
+        Args:
+            path: Caminho do arquivo animado
+            window: Quantidade máxima de quadros completos mantidos
+            keyframe_interval: Guarda um quadro completo no store a cada N quadros
+        """
+        self.path = path
+        self.window = max(2, window)
+        self._image = Image.open(path)
+        self.n_frames = getattr(self._image, "n_frames", 1)
+        self.default_duration = self._image.info.get("duration", 100) or 100
+        self._store = CompactFrameStore(keyframe_interval)
+        self._frames = OrderedDict()  # índice -> quadro completo
+        self._decoder_lock = threading.Lock()  # o decodificador PIL não é thread-safe
+        self._condition = threading.Condition()
+        self._playhead = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self.n_frames
+
+    @property
+    def nbytes(self) -> int:
+        """Memória aproximada do store compacto (sem a janela de quadros completos)."""
+        return self._store.nbytes
+
+    def get_frame(self, index: int) -> Image.Image:
+        """Retorna o quadro pedido, decodificando-o agora se ainda não estiver pronto."""
+        index %= self.n_frames
+        with self._condition:
+            frame = self._frames.get(index)
+        if frame is not None:
+            return frame
+        return self._decode(index)
+
+    def get_duration(self, index: int) -> int:
+        """Duração do quadro em ms (a padrão do arquivo, enquanto não for decodificado)."""
+        index %= self.n_frames
+        if index < len(self._store):
+            return self._store.get_duration(index) or self.default_duration
+        return self.default_duration
+
+    def nearest_keyframe(self, index: int) -> Optional[int]:
+        """Índice do quadro completo mais próximo antes de index, para busca rápida."""
+        index %= self.n_frames
+        if len(self._store) == 0:
+            return None
+        return self._store.nearest_keyframe(min(index, len(self._store) - 1))
+
+    def set_playhead(self, index: int):
+        """Informa a posição de reprodução; a decodificação segue à frente dela."""
+        with self._condition:
+            self._playhead = index % self.n_frames
+            self._evict()
+            self._condition.notify()
+
+    def close(self):
+        """Encerra a thread de decodificação e fecha o arquivo."""
+        with self._condition:
+            self._closed = True
+            self._frames.clear()
+            self._condition.notify()
+        with self._decoder_lock:
+            self._image.close()
+
+    def _ahead(self, index: int) -> int:
+        """Distância (circular) de um quadro à frente da posição de reprodução."""
+        return (index - self._playhead) % self.n_frames
+
+    def _evict(self):
+        # Descarta primeiro os quadros que ficaram para trás da reprodução
+        while len(self._frames) > self.window:
+            farthest = max(self._frames, key=self._ahead)
+            del self._frames[farthest]
+
+    def _decode(self, index: int) -> Image.Image:
+        with self._decoder_lock:
+            if self._closed:
+                raise ValueError("Fonte de quadros fechada")
+            # O arquivo só é percorrido para frente, uma única vez; depois disso
+            # os quadros vêm do store compacto
+            store = self._store
+            while len(store) <= index:
+                self._image.seek(len(store))
+                store.append(
+                    self._image.copy(),
+                    self._image.info.get("duration", self.default_duration),
+                    getattr(self._image, "disposal_method", 0)
+                )
+            frame = store.expand(index)
+        with self._condition:
+            self._frames[index] = frame
+            self._evict()
+        return frame
+
+    def _next_missing(self) -> Optional[int]:
+        for offset in range(min(self.window, self.n_frames)):
+            index = (self._playhead + offset) % self.n_frames
+            if index not in self._frames:
+                return index
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                index = self._next_missing()
+                while index is None and not self._closed:
+                    self._condition.wait()
+                    index = self._next_missing()
+                if self._closed:
+                    return
+            try:
+                self._decode(index)
+            except Exception as e:
+                if not self._closed:
+                    print(f"Erro ao decodificar quadro {index}: {e}")
+                return
@@ -0,0 +1,189 @@
+# file: animation_player.py
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from PIL import Image
+
+from image_processor import ImageProcessor
+
+
+class AnimationPlayer:
+    """
+    Reprodução de animações com bitmaps pré-renderizados.
+
+    Cada quadro é renderizado uma única vez para o zoom e o tamanho de canvas
+    atuais e guardado como PhotoImage; a cada tick o player só troca a imagem
+    de um único item do canvas. Os tempos seguem a duração de cada quadro e,
+    se a reprodução atrasar, quadros são pulados para manter o ritmo. O cache
+    só é descartado quando a visualização (zoom, tamanho) muda.
+
+    O cache é limitado por memória: se todos os quadros no tamanho exibido
+    não couberem no orçamento (ex.: animação longa em zoom alto), o player
+    passa a renderizar cada quadro na hora, sem guardar os bitmaps.
+    """
+
+    def __init__(self, widget, canvas, max_frames: int = 512, max_bytes: int = 256 * 1024 * 1024,
+                 tags: Tuple[str, ...] = ("image",)):
+        """
+        Args:
+            widget: Widget Tk usado para agendar os ticks com after()
+            canvas: Canvas Tk onde a animação é exibida
+            max_frames: Número máximo de quadros pré-renderizados mantidos
+            max_bytes: Orçamento de memória dos bitmaps em bytes
+            tags: Tags do item de imagem no canvas
+        """
+        self.widget = widget
+        self.canvas = canvas
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.tags = tags
+        self.frames = None
+        self.render_frame = None
+        self.view_key = None
+        self.position = (0, 0)
+        self.current_frame = 0
+        self.item = None
+        self._photos = OrderedDict()  # índice do quadro -> PhotoImage
+        self.current_bytes = 0
+        self.on_demand = False  # True quando os quadros não cabem no orçamento
+        self._photo = None  # Bitmap exibido (o Tk não guarda referência própria)
+        self._job = None
+        self._frame_start = 0.0
+
+        # Estatísticas
+        self.rendered = 0
+        self.reused = 0
+        self.skipped = 0
+
+    @property
+    def is_playing(self) -> bool:
+        return self._job is not None
+
+    def play(self, frames, render_frame: Callable[[Image.Image], Image.Image], start: int = 0):
+        """
+        Inicia a reprodução (o primeiro quadro aparece no próximo set_view).
+
+        Args:
+            frames: Fonte de quadros (len(), get_frame(i), get_duration(i))
+            render_frame: Converte um quadro original no bitmap exibido
+            start: Quadro inicial
+        """
+        self.stop()
+        self.frames = frames
+        self.render_frame = render_frame
+        self.current_frame = start % len(frames)
+        self._frame_start = time.perf_counter()
+        self._schedule()
+
+    def stop(self):
+        """Para a reprodução e remove o item do canvas."""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if self.item is not None and self.canvas.type(self.item):
+            self.canvas.delete(self.item)
+        self.item = None
+        self._clear_photos()
+        self.view_key = None
+        self.frames = None
+
+    def set_view(self, view_key: Hashable, position: Tuple[float, float]) -> Optional[int]:
+        """
+        Atualiza a visualização e redesenha o quadro atual.
+
+        Args:
+            view_key: Identifica o zoom/tamanho; uma chave nova descarta os bitmaps
+            position: Centro da imagem no canvas
+
+        Returns:
+            Optional[int]: ID do item de imagem no canvas
+        """
+        if view_key != self.view_key:
+            self._clear_photos()
+            self.view_key = view_key
+        self.position = position
+        if self.frames is not None:
+            self._show(self.current_frame)
+        return self.item
+
+    def _clear_photos(self):
+        self._photos.clear()
+        self.current_bytes = 0
+        self.on_demand = False
+
+    def _get_photo(self, index: int):
+        photo = self._photos.get(index)
+        if photo is not None:
+            self._photos.move_to_end(index)
+            self.reused += 1
+            return photo
+        bitmap = self.render_frame(self.frames.get_frame(index))
+        photo = ImageProcessor.convert_to_photoimage(bitmap)
+        self.rendered += 1
+        if self.on_demand:
+            return photo
+
+        # Os quadros de uma animação têm o mesmo tamanho exibido; se todos
+        # juntos estouram o orçamento, um LRU só trocaria bitmaps a cada volta
+        frame_bytes = bitmap.width * bitmap.height * 4
+        if frame_bytes * min(len(self.frames), self.max_frames) > self.max_bytes:
+            self._clear_photos()
+            self.on_demand = True
+            return photo
+
+        self._photos[index] = photo
+        self.current_bytes += frame_bytes
+        while len(self._photos) > self.max_frames or self.current_bytes > self.max_bytes:
+            _, evicted = self._photos.popitem(last=False)
+            self.current_bytes -= evicted.width() * evicted.height() * 4
+        return photo
+
+    def _show(self, index: int):
+        photo = self._photo = self._get_photo(index)
+        if self.item is None or not self.canvas.type(self.item):
+            self.item = self.canvas.create_image(*self.position, image=photo, anchor="center", tags=self.tags)
+        else:
+            self.canvas.itemconfig(self.item, image=photo)
+            self.canvas.coords(self.item, *self.position)
+
+    def _schedule(self):
+        delay = (self._frame_start + self.frames.get_duration(self.current_frame) / 1000 - time.perf_counter()) * 1000
+        self._job = self.widget.after(max(1, int(delay)), self._tick)
+
+    def _tick(self):
+        self._job = None
+        frames = self.frames
+        if frames is None:
+            return
+        now = time.perf_counter()
+
+        # Avança para o próximo quadro; se estiver atrasado, pula os que já passaram
+        start = self._frame_start + frames.get_duration(self.current_frame) / 1000
+        index = (self.current_frame + 1) % len(frames)
+        if now - start > 1.0:
+            # Atraso grande (janela arrastada, sistema ocupado): ressincroniza
+            start = now
+        while start + frames.get_duration(index) / 1000 <= now:
+            start += frames.get_duration(index) / 1000
+            index = (index + 1) % len(frames)
+            self.skipped += 1
+        if hasattr(frames, "set_playhead"):
+            frames.set_playhead(index)
+
+        self.current_frame = index
+        self._frame_start = start
+        if self.view_key is not None:
+            self._show(index)
+        self._schedule()
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do player."""
+        return {
+            "cached_frames": len(self._photos),
+            "bytes": self.current_bytes,
+            "on_demand": self.on_demand,
+            "rendered": self.rendered,
+            "reused": self.reused,
+            "skipped": self.skipped,
+        }
@@ -41,13 +41,28 @@ from preferences import (
     THUMB_WINDOW_BACKGROUND_COLOR,
     THUMB_BORDER_COLOR,
     THUMB_TEXT_COLOR,
-    THUMB_TEXT_TEMPLATE
+    THUMB_TEXT_TEMPLATE,
+    FILTER_PROCESS_POOL
 )
 from customtkinter import CTkImage
 from collections import deque  # Import deque for efficient queue
 from extensions.history_ui import HistoryUI  # Adicione esta importação
 import math
 from image_processor import ImageProcessor
+from image_pyramid import ImagePyramid
+from render_cache import RenderCache
+from frame_scheduler import FrameScheduler
+from tile_renderer import TileRenderer
+from render_worker import RenderWorker
+from display_surface import DisplaySurface
+from animation_frames import LazyFrameSource
+from animation_player import AnimationPlayer
+from filter_jobs import FilterJobService, apply_in_strips
+from adjustment_stack import AdjustmentStack
+from color_lut import ColorLUT, FUSABLE_FILTERS, apply_adjustments, compile_adjustments
+from process_pool import get_process_pool
+from palette_cache import QUANTIZED_PREVIEW_SIZE, image_content_hash, load_palette, save_palette
+from tiled_executor import set_default_executor
 import requests
 import base64
 from io import BytesIO
@@ -88,7 +103,7 @@ class MonitorWindow(ctk.CTkToplevel):
     def __init__(self, parent):
         super().__init__(parent)
         self.title("Monitor de Informações")
-        self.geometry("400x800")  # Aumentei a altura para acomodar as novas informações
+        self.geometry("400x1000")  # Aumentei a altura para acomodar as novas informações
         self.parent = parent
         
         # Configurações da janela
@@ -122,6 +137,11 @@ class MonitorWindow(ctk.CTkToplevel):
             ("mouse_pos", "Posição do Mouse:"),
             ("mouse_speed_x", "Velocidade do Mouse X:"),
             ("mouse_speed_y", "Velocidade do Mouse Y:"),
+            ("render_cache", "Cache de Renderização:"),
+            ("frame_scheduler", "Agendador de Quadros:"),
+            ("render_worker", "Renderização em Segundo Plano:"),
+            ("animation_player", "Reprodução de Animação:"),
+            ("filter_jobs", "Filtros em Segundo Plano:"),
             #("image_speed", "Velocidade da Imagem:")
         ]
         
@@ -234,6 +254,60 @@ class MonitorWindow(ctk.CTkToplevel):
             self.labels["mouse_speed_x"].configure(text=f"{abs(speed_x):.1f} pixels/segundo")
             self.labels["mouse_speed_y"].configure(text=f"{abs(speed_y):.1f} pixels/segundo")
             
+            # Estatísticas do cache de renderização
+            cache_stats = self.parent.render_cache.stats()
+            self.labels["render_cache"].configure(
+                text=(
+                    f"Acertos: {cache_stats['hits']} | Falhas: {cache_stats['misses']} "
+                    f"({cache_stats['hit_rate'] * 100:.1f}%)\n"
+                    f"Entradas: {cache_stats['entries']} | Descartes: {cache_stats['evictions']}\n"
+                    f"Memória: {cache_stats['bytes'] / (1024 * 1024):.1f} / "
+                    f"{cache_stats['max_bytes'] / (1024 * 1024):.0f} MB"
+                )
+            )
+            
+            # Estatísticas do agendador de quadros
+            scheduler_stats = self.parent.frame_scheduler.stats()
+            self.labels["frame_scheduler"].configure(
+                text=(
+                    f"Quadros: {scheduler_stats['frames']} | Pedidos: {scheduler_stats['requests']}\n"
+                    f"Agrupados: {scheduler_stats['merged']} | Descartados: {scheduler_stats['dropped']} | "
+                    f"Adiados: {scheduler_stats['deferred']}\n"
+                    f"Último quadro: {scheduler_stats['last_frame_ms']:.1f} ms | "
+                    f"Acima do orçamento: {scheduler_stats['over_budget']}"
+                )
+            )
+            
+            # Estatísticas do worker de renderização
+            worker_stats = self.parent.render_worker.stats()
+            self.labels["render_worker"].configure(
+                text=(
+                    f"Pedidos: {worker_stats['submitted']} | Concluídos: {worker_stats['completed']}\n"
+                    f"Substituídos: {worker_stats['superseded']} | Descartados: {worker_stats['discarded']}"
+                )
+            )
+            
+            # Estatísticas da reprodução de animação
+            player_stats = self.parent.animation_player.stats()
+            self.labels["animation_player"].configure(
+                text=(
+                    f"Quadros em cache: {player_stats['cached_frames']} "
+                    f"({player_stats['bytes'] / (1024 * 1024):.1f} MB"
+                    f"{', sob demanda' if player_stats['on_demand'] else ''}) | "
+                    f"Renderizados: {player_stats['rendered']}\n"
+                    f"Reaproveitados: {player_stats['reused']} | Pulados: {player_stats['skipped']}"
+                )
+            )
+            
+            # Estatísticas dos filtros em segundo plano
+            job_stats = self.parent.filter_jobs.stats()
+            self.labels["filter_jobs"].configure(
+                text=(
+                    f"Pedidos: {job_stats['submitted']} | Concluídos: {job_stats['completed']}\n"
+                    f"Substituídos: {job_stats['superseded']} | Cancelados: {job_stats['cancelled']}"
+                )
+            )
+            
             self.last_mouse_pos = mouse_pos
             self.last_update_time = current_time
             
@@ -328,11 +402,13 @@ class FiltersWindow(ctk.CTkToplevel):
                 from_=min_val,
                 to=max_val,
                 number_of_steps=100,
-                # Chama o método da classe pai (ImageEditorApp) corretamente
-                command=lambda v, a=attr: self.parent.apply_filter_or_effect(a, value=float(v))
+                # Agenda a prévia na classe pai (ImageEditorApp); ticks no mesmo quadro são agrupados
+                command=lambda v, a=attr: self.parent.queue_filter(a, float(v))
             )
             slider.pack(side="right", expand=True, fill="x", padx=5)
             slider.set(1.0)  # Valor padrão
+            # Ao soltar, o filtro é aplicado em resolução total em segundo plano
+            slider.bind("<ButtonRelease-1>", lambda e, a=attr: self.parent.commit_filter(a))
 
             # Armazena referência ao slider
             setattr(self, f"{attr}_slider", slider)
@@ -374,8 +450,8 @@ class FiltersWindow(ctk.CTkToplevel):
         def update_pixelate(value):
             pixel_size = int(value) # O tamanho do pixel deve ser inteiro
             pixel_value_label.configure(text=f"{pixel_size}") # Atualiza o label que mostra o número
-            # Chama o método principal passando 'pixelate' e o valor inteiro
-            self.parent.apply_filter_or_effect(attr_pixelate, value=pixel_size)
+            # Agenda a prévia do filtro 'pixelate' com o valor inteiro
+            self.parent.queue_filter(attr_pixelate, pixel_size)
 
         # Slider para Pixelate
         slider_pixelate = ctk.CTkSlider(
@@ -388,6 +464,7 @@ class FiltersWindow(ctk.CTkToplevel):
         # Ocupa o espaço horizontal restante no frame
         slider_pixelate.pack(side="right", expand=True, fill="x", padx=5)
         slider_pixelate.set(default_val_pixelate) # Define o valor inicial no slider
+        slider_pixelate.bind("<ButtonRelease-1>", lambda e: self.parent.commit_filter(attr_pixelate))
 
         # Armazena referência ao slider (opcional, mas pode ser útil)
         setattr(self, f"{attr_pixelate}_slider", slider_pixelate)
@@ -593,8 +670,7 @@ class ColorPaletteWindow(ctk.CTkToplevel):
         frame.pack(expand=True, fill="both", padx=5, pady=5)
         
         # Redimensiona a imagem para caber na janela
-        max_size = (700, 500)
-        quantized_image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        quantized_image.thumbnail(QUANTIZED_PREVIEW_SIZE, Image.Resampling.LANCZOS)
         
         # Converte para CTkImage
         photo = ctk.CTkImage(
@@ -1167,9 +1243,11 @@ class CreateImageWindow(ctk.CTkToplevel):
                 self.cap.release()
                 
         except Exception as e:
+            # O nome 'e' deixa de existir ao sair do except; a lambda roda depois
+            message = str(e)
             if hasattr(self, 'status_label') and self.winfo_exists():
-                self.after(0, lambda: self.status_label.configure(
-                    text=f"Erro na captura: {str(e)}", 
+                self.after(0, lambda message=message: self.status_label.configure(
+                    text=f"Erro na captura: {message}", 
                     text_color="red"
                 ))
             print(f"Erro na captura: {str(e)}")
@@ -1349,12 +1427,44 @@ class ImageEditorApp(ctk.CTk):
         self.minsize(800, 600)
 
         # Inicialização de variáveis de imagem
+        self.image_generation = 0  # Incrementado sempre que loaded_image é substituída
+        self.image_pyramid = None  # Pirâmide de resoluções da imagem atual
+        render_cache_mb = int(load_global_preferences("render_cache_mb") or 256)
+        self.render_cache = RenderCache(render_cache_mb * 1024 * 1024)  # Bitmaps já renderizados
         self.image_path = None
         self.loaded_image = None
         self.tk_image = None
         self.image_modified = False
         self.zoom_level = 1.0
 
+        # Renderização apenas da área visível do canvas
+        self.viewport_rendering = (load_global_preferences("render_viewport_only") or "1") == "1"
+        self.view_center = (0.5, 0.5)  # Ponto da imagem (normalizado) no centro do canvas
+        # Modo pixel art: zoom em fatores inteiros com replicação de pixels
+        self.pixel_art_mode = (load_global_preferences("pixel_art_mode") or "0") == "1"
+        self._image_center = None  # Centro da imagem exibida no canvas
+        self._display_size = None  # Tamanho da imagem exibida (ajuste + zoom)
+
+        # Renderização progressiva: prévia rápida e refinamento após inatividade
+        self.refine_delay = 150  # ms sem novos eventos antes do refinamento LANCZOS
+        self._refine_job = None
+        self._preview_key = None  # Estado cuja prévia rápida está no canvas
+
+        # Reamostragem em qualidade final fora da thread do Tk
+        self.render_worker = RenderWorker(self)
+
+        # Filtros em segundo plano: um pedido pendente por destino, o mais recente vence
+        self.filter_jobs = FilterJobService(self)
+
+        if FILTER_PROCESS_POOL:
+            # Filtros que não liberam o GIL escalam em processos; os blocos
+            # passam por memória compartilhada
+            set_default_executor(get_process_pool())
+
+        # Análise de paleta em segundo plano: andamento e último resultado (geração, resultado)
+        self._palette_progress = ("", 0.0)
+        self._palette_result = None
+
         # Inicialização de variáveis de pan
         self._pan_start_x = None
         self._pan_start_y = None
@@ -1388,6 +1498,14 @@ class ImageEditorApp(ctk.CTk):
         self.fit_mode = load_global_preferences() or "fit"
         init_db()
 
+        # Agendador de quadros: agrupa invalidações em um único redesenho
+        self.frame_scheduler = FrameScheduler(self)
+        self._pending_filter = None  # Último valor de slider ainda não aplicado
+        self._filter_preview = None  # (filtro, valor) exibido na prévia, aguardando a soltura
+        self._filter_proxy = None  # (chave, pilha sobre a área visível reduzida, posição, escala)
+        self.adjustments = None  # Pilha de ajustes dos sliders sobre a imagem sem ajustes
+        self._adjustments_generation = None  # Geração de loaded_image produzida pela pilha
+
         # Adiciona variável para a janela de monitoramento
         self.monitor_window = None
 
@@ -1396,6 +1514,13 @@ class ImageEditorApp(ctk.CTk):
 
         # Inicializa o gerenciador de histórico (APENAS UMA VEZ)
         self.history_ui = HistoryUI(self, DB_PATH)
+
+        # Ordem de execução dentro de um quadro
+        self.frame_scheduler.register("filter", self._apply_pending_filter)
+        self.frame_scheduler.register("toolbar", self.update_toolbar_container_height)
+        self.frame_scheduler.register("image", self.request_progressive_render)
+        self.frame_scheduler.register("rotation", self._draw_rotation_preview)
+        self.frame_scheduler.register("status", self.update_status_bar)
         
 
 
@@ -1415,6 +1540,39 @@ class ImageEditorApp(ctk.CTk):
         if last_path and os.path.exists(last_path):
             self.threaded_load_image(last_path)
     
+    @property
+    def loaded_image(self):
+        return self._loaded_image
+
+    @loaded_image.setter
+    def loaded_image(self, image):
+        """Substitui a imagem atual e invalida tudo o que foi derivado dela"""
+        self._loaded_image = image
+        self.render_cache.discard_generation(self.image_generation)
+        self.image_generation += 1
+        if self.image_pyramid is not None:
+            self.image_pyramid.cancel()
+            self.image_pyramid = None
+
+    def ensure_image_pyramid(self):
+        """Inicia a construção da pirâmide de resoluções, se ainda não existir"""
+        if self.image_pyramid is not None or not self.loaded_image or self.is_animated:
+            return
+        self.image_pyramid = ImagePyramid(self.loaded_image)
+        generation = self.image_generation
+
+        def on_ready(pyramid):
+            # Redesenha com os novos níveis se a imagem ainda for a mesma
+            self.after(0, lambda: self.display_image() if generation == self.image_generation else None)
+
+        self.image_pyramid.build_async(on_ready)
+
+    def get_display_source(self, scale):
+        """Retorna o nível da pirâmide mais adequado para exibir na escala pedida"""
+        if self.image_pyramid is None:
+            return self.loaded_image
+        return self.image_pyramid.get_level(scale)
+
     def show_filters_window(self):
         """Abre a janela de filtros"""
         if not hasattr(self, 'filters_window') or not self.filters_window or not self.filters_window.winfo_exists():
@@ -1731,10 +1889,13 @@ class ImageEditorApp(ctk.CTk):
             
         # Pega o item da imagem
         self._pan_image_id = items[-1]
+
+        # Um resultado de fundo chegando agora apagaria a borda de seleção
+        self.cancel_refinement()
         
-        # Obtém as dimensões e posição atual da imagem
-        bbox = self.canvas.bbox(self._pan_image_id)
-        if not bbox:
+        # Obtém as dimensões e posição atual da imagem (o item do canvas pode
+        # conter apenas a parte visível, então usa o tamanho exibido completo)
+        if not self._image_center or not self._display_size:
             return
             
         # Armazena a posição inicial do mouse
@@ -1742,19 +1903,11 @@ class ImageEditorApp(ctk.CTk):
         self._pan_start_y = event.y
         
         # Armazena a posição inicial da imagem
-        current_pos = self.canvas.coords(self._pan_image_id)
-        if current_pos:
-            self._pan_image_pos = [current_pos[0], current_pos[1]]
-            self._initial_image_pos = [current_pos[0], current_pos[1]]
-        else:
-            # Se não conseguir obter a posição atual, usa o centro do canvas
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            self._pan_image_pos = [canvas_width/2, canvas_height/2]
-            self._initial_image_pos = [canvas_width/2, canvas_height/2]
+        self._pan_image_pos = list(self._image_center)
+        self._initial_image_pos = list(self._image_center)
         
-        # Cria a borda de seleção usando as dimensões do bbox
-        x1, y1, x2, y2 = bbox
+        # Cria a borda de seleção usando as dimensões exibidas
+        x1, y1, x2, y2 = ImageProcessor.calculate_selection_box(self._image_center, self._display_size)
         if hasattr(self, '_selection_box') and self._selection_box:
             self.canvas.delete(self._selection_box)
         self._selection_box = self.canvas.create_rectangle(
@@ -1783,12 +1936,7 @@ class ImageEditorApp(ctk.CTk):
             # Obtém as dimensões do canvas e da imagem
             canvas_width = self.canvas.winfo_width()
             canvas_height = self.canvas.winfo_height()
-            bbox = self.canvas.bbox(self._pan_image_id)
-            if not bbox:
-                return
-                
-            image_width = bbox[2] - bbox[0]
-            image_height = bbox[3] - bbox[1]
+            image_width, image_height = self._display_size
             
             # Calcula a nova posição usando o ImageProcessor
             new_x, new_y = ImageProcessor.process_pan(
@@ -1818,15 +1966,34 @@ class ImageEditorApp(ctk.CTk):
     def end_pan(self, event):
         """Finaliza o movimento de pan"""
         try:
-            if self._pan_image_id and hasattr(self, '_new_pos') and self._new_pos:
-                # Move a imagem para a nova posição
-                new_x, new_y = self._new_pos
-                self.canvas.coords(self._pan_image_id, new_x, new_y)
-                self._pan_image_pos = [new_x, new_y]
-            
+            pan_image_id = self._pan_image_id
+            new_pos = self._new_pos
+            rendered = False
+
             # Remove a borda de seleção
             if self._selection_box:
                 self.canvas.delete(self._selection_box)
+
+            if pan_image_id and new_pos:
+                # Converte a nova posição no ponto da imagem que fica no centro do canvas
+                new_x, new_y = new_pos
+                display_width, display_height = self._display_size
+                self.view_center = (
+                    0.5 - (new_x - self.canvas.winfo_width() / 2) / display_width,
+                    0.5 - (new_y - self.canvas.winfo_height() / 2) / display_height
+                )
+                if self.viewport_rendering:
+                    # Renderiza a nova área visível
+                    self.display_image()
+                    rendered = True
+                else:
+                    # Move a imagem para a nova posição
+                    self.canvas.coords(pan_image_id, new_x, new_y)
+                    self._image_center = (new_x, new_y)
+
+            if not rendered and self._preview_key is not None:
+                # O start_pan cancelou o refinamento e a prévia rápida ainda está no canvas
+                self.schedule_refinement()
             
         except Exception as e:
             print(f"Erro ao finalizar pan: {e}")
@@ -1901,6 +2068,16 @@ class ImageEditorApp(ctk.CTk):
         self.canvas = ctk.CTkCanvas(self.image_frame, bg="#333333", highlightthickness=0)
         self.canvas.grid(row=0, column=0, sticky="nsew")
 
+        # Renderizador em blocos para imagens maiores que o canvas
+        self.tile_renderer = TileRenderer(self.canvas, tile_size=int(load_global_preferences("render_tile_size") or 256))
+        self._render_path = None  # "tiles", "single" ou "animation"
+
+        # Item único de imagem, atualizado com PhotoImage.paste
+        self.display_surface = DisplaySurface(self.canvas)
+
+        # Reprodução de animações com bitmaps pré-renderizados por quadro
+        self.animation_player = AnimationPlayer(self, self.canvas)
+
         # Barra de status
         self.status_bar = ctk.CTkLabel(self, text="Nenhuma imagem carregada", anchor="w")
         self.status_bar.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
@@ -1916,6 +2093,10 @@ class ImageEditorApp(ctk.CTk):
         self.rotation_angle = 0
         self.rotation_start_angle = 0
         self.rotation_center = None
+        self._rotation_source = None  # Imagem sem rotação; rotation_angle é relativo a ela
+        self._rotation_generation = None  # Geração de loaded_image que corresponde à fonte
+        self._rotation_proxy = None  # (prévia do tamanho da tela, fator até a escala exibida)
+        self._rotation_commit = None  # Identifica a rotação em resolução total em andamento
     
         # Adicionando um menu de filtros
         menu_bar = tk.Menu(self)  # Usando o menu padrão do tkinter
@@ -1927,6 +2108,9 @@ class ImageEditorApp(ctk.CTk):
         filters_menu.add_command(label="Escala de Cinza", command=lambda: self.apply_filter("grayscale"))
         filters_menu.add_command(label="Sepia", command=lambda: self.apply_filter("sepia"))
         filters_menu.add_command(label="Negativo", command=lambda: self.apply_filter("negative"))
+        filters_menu.add_separator()
+        filters_menu.add_command(label="Aplicar LUT (.cube)...", command=self.apply_lut_file)
+        filters_menu.add_command(label="Exportar ajustes como LUT (.cube)...", command=self.export_adjustments_lut)
 
 
         # Adicionar widgets no menu lateral
@@ -2085,6 +2269,22 @@ class ImageEditorApp(ctk.CTk):
         command=lambda: self.set_fit_mode("fit"))
         adjust_screen_button.grid(row=current_row, column=0, pady=5, padx=5)
         current_row += 1
+
+        # Renderização apenas da área visível
+        self.viewport_switch = ctk.CTkSwitch(self.toolbar, text="Só área visível",
+        command=self.toggle_viewport_rendering)
+        if self.viewport_rendering:
+            self.viewport_switch.select()
+        self.viewport_switch.grid(row=current_row, column=0, pady=5, padx=5)
+        current_row += 1
+
+        # Zoom inteiro com pixels nítidos
+        self.pixel_art_switch = ctk.CTkSwitch(self.toolbar, text="Modo pixel art",
+        command=self.toggle_pixel_art_mode)
+        if self.pixel_art_mode:
+            self.pixel_art_switch.select()
+        self.pixel_art_switch.grid(row=current_row, column=0, pady=5, padx=5)
+        current_row += 1
         
         # Separador 2
         separator2 = ctk.CTkFrame(self.toolbar, height=2, width=180)
@@ -2193,14 +2393,20 @@ class ImageEditorApp(ctk.CTk):
             return
 
         # Calcula o centro da imagem na tela
-        bbox = self.canvas.bbox("image")
-        if not bbox:
+        if not self._image_center or not self._display_size:
             return
 
-        self.rotation_center = (
-            (bbox[0] + bbox[2]) / 2,
-            (bbox[1] + bbox[3]) / 2
-        )
+        self.rotation_center = self._image_center
+
+        # A rotação é sempre aplicada à imagem original, não à já rotacionada;
+        # se a imagem mudou por outro caminho, ela passa a ser a nova origem
+        if self._rotation_source is None or self._rotation_generation != self.image_generation:
+            self._rotation_source = self.loaded_image
+            self._rotation_generation = self.image_generation
+            self.rotation_angle = 0
+        # Uma rotação final ainda em andamento fica obsoleta
+        self._rotation_commit = None
+        self._rotation_proxy = self.create_rotation_proxy()
 
         # Calcula o ângulo inicial
         dx = event.x - self.rotation_center[0]
@@ -2208,6 +2414,24 @@ class ImageEditorApp(ctk.CTk):
         self.rotation_start_angle = math.degrees(math.atan2(dy, dx))
         self.initial_rotation = self.rotation_angle
 
+    def create_rotation_proxy(self):
+        """Cria a cópia reduzida da imagem original usada na prévia da rotação
+        
+        Returns:
+            tuple: (prévia, fator de ampliação até a escala exibida)
+        """
+        source = self._rotation_source
+        scale = self._display_size[0] / self.loaded_image.width
+        # Nunca maior que a original nem muito maior que o canvas
+        canvas_side = max(self.canvas.winfo_width(), self.canvas.winfo_height(), 1)
+        proxy_scale = min(scale, 1.0, 2 * canvas_side / max(source.size))
+        proxy_size = (max(1, round(source.width * proxy_scale)), max(1, round(source.height * proxy_scale)))
+        if proxy_size == source.size:
+            proxy = source
+        else:
+            proxy = source.resize(proxy_size, Image.Resampling.BOX)
+        return ImageProcessor.optimize_memory(proxy), scale / proxy_scale
+
     def update_rotation(self, event):
         """Atualiza a rotação conforme o movimento do mouse"""
         if not self.loaded_image or not self.rotation_center:
@@ -2222,9 +2446,33 @@ class ImageEditorApp(ctk.CTk):
         delta_angle = current_angle - self.rotation_start_angle
         new_angle = (self.initial_rotation + delta_angle) % 360
 
-        # Atualiza a rotação
+        # Atualiza a rotação; vários movimentos no mesmo quadro geram uma única prévia
         self.rotation_angle = new_angle
-        self.apply_rotation()
+        self.frame_scheduler.invalidate("rotation")
+
+    def _draw_rotation_preview(self):
+        """Exibe a prévia rotacionada (apenas a cópia reduzida é processada)
+        
+        Só a parte visível da prévia é ampliada, então o bitmap nunca é maior
+        que o canvas, qualquer que seja o zoom.
+        """
+        if self._rotation_proxy is None or not self._image_center:
+            return
+        proxy, ratio = self._rotation_proxy
+        preview = proxy.rotate(-self.rotation_angle, resample=Image.Resampling.BILINEAR, expand=True)
+        display_size = (max(1, round(preview.width * ratio)), max(1, round(preview.height * ratio)))
+        canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        self.cancel_refinement()
+        region = ImageProcessor.calculate_visible_region(display_size, canvas_size, self._image_center)
+        if region is None:
+            self.display_surface.hide()
+            self.tile_renderer.remove_items()
+            self._render_path = None
+            return
+        bitmap = ImageProcessor.render_region(preview, display_size, region, Image.Resampling.NEAREST)
+        left = self._image_center[0] - display_size[0] / 2
+        top = self._image_center[1] - display_size[1] / 2
+        self._show_bitmap(bitmap, (left + region[0], top + region[1]), "nw")
 
     def end_rotation(self, event):
         """Finaliza a rotação"""
@@ -2236,20 +2484,41 @@ class ImageEditorApp(ctk.CTk):
                 self.canvas.yview()[0],
                 self.fit_mode
             )
+        if (self.rotation_center and self._rotation_proxy is not None
+                and self.rotation_angle != self.initial_rotation):
+            # Desenha a última prévia e calcula a rotação final em segundo plano
+            self.frame_scheduler.flush()
+            self.apply_rotation()
+        self._rotation_proxy = None
         self.rotation_center = None
 
     def apply_rotation(self):
-        """Aplica a rotação à imagem"""
-        if not self.loaded_image:
+        """Aplica a rotação à imagem original em resolução total, em segundo plano"""
+        if not self.loaded_image or self._rotation_source is None:
             return
 
-        # Rotaciona a imagem
-        rotated_image = ImageProcessor.rotate_image(self.loaded_image, -self.rotation_angle)
-        
-        # Otimiza o uso de memória
-        rotated_image = ImageProcessor.optimize_memory(rotated_image)
-        
+        source = self._rotation_source
+        angle = self.rotation_angle
+        commit = self._rotation_commit = object()
+
+        def task():
+            # Rotaciona a imagem original uma única vez
+            rotated_image = ImageProcessor.rotate_image(source, -angle)
+            
+            # Otimiza o uso de memória
+            rotated_image = ImageProcessor.optimize_memory(rotated_image)
+            self.after(0, lambda: self._finish_rotation(commit, rotated_image))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _finish_rotation(self, commit, rotated_image):
+        """Substitui a imagem pela rotação final, se ela ainda for atual"""
+        if commit is not self._rotation_commit or self._rotation_generation != self.image_generation:
+            # Uma nova rotação começou ou a imagem mudou por outro caminho
+            return
+        self._rotation_commit = None
         self.loaded_image = rotated_image
+        self._rotation_generation = self.image_generation
         self.image_modified = True
         self.display_image()
         self.update_status_bar()
@@ -2307,48 +2576,221 @@ class ImageEditorApp(ctk.CTk):
             import traceback
             traceback.print_exc()
     
-    def display_image(self, image=None):
-        """Exibe a imagem no canvas"""
-        if image is None and not self.loaded_image:
+    def request_progressive_render(self):
+        """Exibe uma prévia rápida agora e agenda o refinamento em alta qualidade"""
+        self.cancel_refinement()
+        if not self.loaded_image:
             return
+        if not self.display_image(fast=True):
+            self.schedule_refinement()
+
+    def schedule_refinement(self):
+        """Agenda a renderização em qualidade final depois de refine_delay ms sem novos eventos"""
+        if self._refine_job is not None:
+            self.after_cancel(self._refine_job)
+        self._refine_job = self.after(self.refine_delay, self._refine_display)
+
+    def cancel_refinement(self):
+        """Cancela o refinamento pendente (um novo evento de entrada chegou)"""
+        if self._refine_job is not None:
+            self.after_cancel(self._refine_job)
+            self._refine_job = None
+        # Resultados da renderização de fundo em andamento serão descartados
+        self.render_worker.cancel()
+
+    def _refine_display(self):
+        """Substitui a prévia rápida pela renderização LANCZOS"""
+        self._refine_job = None
+        if self.loaded_image:
+            self.display_image()
+
+    def display_image(self, image=None, fast=False):
+        """Exibe a imagem no canvas
+        
+        A reamostragem em qualidade final roda no RenderWorker; a thread principal
+        mostra uma prévia rápida e depois só coloca no canvas o bitmap pronto.
+        
+        Args:
+            image: Nova imagem a ser exibida (opcional)
+            fast: Usa reamostragem NEAREST/BOX em vez de LANCZOS (prévia)
+        
+        Returns:
+            bool: True se a qualidade final já está no canvas ou a caminho
+        """
+        if image is None and not self.loaded_image:
+            return False
             
         if image is not None:
             self.loaded_image = image
 
-        # Calcula as novas dimensões baseadas no modo de ajuste
+        # Refinamentos e renderizações de fundo pendentes referem-se a um estado anterior
+        self.cancel_refinement()
+
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
-        
-        new_width, new_height = ImageProcessor.calculate_new_dimensions(
-            self.loaded_image, canvas_width, canvas_height, self.fit_mode
-        )
-        
-        # Aplica o zoom
-        resized_image = ImageProcessor.resize_image(
-            self.loaded_image.copy(), new_width, new_height
-        )
-        if self.zoom_level != 1.0:
-            resized_image = ImageProcessor.apply_zoom(resized_image, self.zoom_level)
-            
-        # Converte para PhotoImage
-        self.photo_image = ImageProcessor.convert_to_photoimage(resized_image)
-        
-        # Atualiza o canvas
-        self.canvas.delete("all")
-        image_item = self.canvas.create_image(
-            canvas_width // 2, canvas_height // 2,
-            image=self.photo_image, anchor="center",
-            tags="image"  # Adiciona a tag "image"
+
+        # Tamanho final da imagem na tela (ajuste + zoom) e posição do seu centro
+        display_width, display_height = ImageProcessor.calculate_display_size(
+            self.loaded_image.size, canvas_width, canvas_height, self.fit_mode, self.zoom_level,
+            integer_scale=self.pixel_art_mode
         )
-        
-        # Armazena o ID da imagem e sua posição inicial
-        self._pan_image_id = image_item
-        self._pan_image_pos = [canvas_width // 2, canvas_height // 2]
+        center_x = canvas_width / 2 + (0.5 - self.view_center[0]) * display_width
+        center_y = canvas_height / 2 + (0.5 - self.view_center[1]) * display_height
+        self._display_size = (display_width, display_height)
+        self._image_center = (center_x, center_y)
+        self._pan_image_pos = [center_x, center_y]
 
         # Atualiza o título da janela
         if hasattr(self, 'image_path') and self.image_path:
             self.title(f"PixelArt Image Editor - {os.path.basename(self.image_path)}")
 
+        if self.is_animated and self.animation_player.is_playing:
+            # O player troca entre bitmaps já renderizados para este zoom e tamanho
+            self._show_animation((display_width, display_height), (center_x, center_y))
+            return True
+
+        # Reamostra a partir do nível da pirâmide mais próximo, não da resolução original
+        self.ensure_image_pyramid()
+        loaded_image = self.loaded_image
+        source = self.get_display_source(display_width / loaded_image.width)
+        preview_resample = ImageProcessor.get_preview_resample(display_width / source.width)
+        display_size = self._display_size
+        generation = self.image_generation
+        origin = (center_x - display_width / 2, center_y - display_height / 2)
+
+        if self.pixel_art_mode:
+            # Escala inteira com replicação de pixels: nítido e barato, sem prévia nem worker
+            self._show_pixel_art(display_size, origin, (canvas_width, canvas_height))
+            return True
+
+        if self.viewport_rendering and (display_width > canvas_width or display_height > canvas_height):
+            # Imagem maior que o canvas: blocos de tamanho fixo, reaproveitados durante o pan
+            if self._render_path != "tiles":
+                self.display_surface.hide()
+            self._render_path = "tiles"
+            self._preview_key = None
+            self._pan_image_id = None
+            tile_renderer = self.tile_renderer
+            missing = tile_renderer.render(
+                source, generation, display_size, origin, (canvas_width, canvas_height),
+                preview_resample if fast else Image.Resampling.LANCZOS,
+                quality="preview" if fast else "final", deferred=not fast
+            )
+            if missing:
+                self.render_worker.submit(
+                    lambda: tile_renderer.render_tile_images(source, display_size, missing),
+                    lambda images: tile_renderer.apply_tile_images(generation, display_size, images)
+                )
+            return not fast
+
+        if self.viewport_rendering:
+            # Reamostra apenas o retângulo visível da imagem
+            region = ImageProcessor.calculate_visible_region(
+                display_size, (canvas_width, canvas_height), self._image_center
+            )
+            if region is None:
+                self.display_surface.hide()
+                self.tile_renderer.remove_items()
+                self._render_path = None
+                return True
+            position, anchor = (origin[0] + region[0], origin[1] + region[1]), "nw"
+
+            def render(resample=Image.Resampling.LANCZOS):
+                return ImageProcessor.render_region(source, display_size, region, resample)
+        else:
+            position, anchor = (center_x, center_y), "center"
+            fit_mode, zoom_level = self.fit_mode, self.zoom_level
+
+            def render(resample=None):
+                if resample is not None:
+                    return source.resize(display_size, resample)
+                # Calcula as novas dimensões baseadas no modo de ajuste
+                new_width, new_height = ImageProcessor.calculate_new_dimensions(
+                    loaded_image, canvas_width, canvas_height, fit_mode
+                )
+                # Aplica o zoom
+                resized_image = ImageProcessor.resize_image(source.copy(), new_width, new_height)
+                if zoom_level != 1.0:
+                    resized_image = ImageProcessor.apply_zoom(resized_image, zoom_level)
+                return resized_image
+
+        # Bitmaps já renderizados para o mesmo estado de visualização são reaproveitados
+        # (o zoom é arredondado: zoom_in seguido de zoom_out não volta ao mesmo float)
+        cache_key = (
+            generation, round(self.zoom_level, 6), self.fit_mode,
+            (canvas_width, canvas_height),
+            self.view_center if self.viewport_rendering else None
+        )
+        cached_image = self.render_cache.get(cache_key)
+        if cached_image is not None:
+            self._show_bitmap(cached_image, position, anchor)
+            return True
+
+        # Prévia rápida imediata (a menos que já esteja no canvas)
+        if fast or self._preview_key != cache_key:
+            self._show_bitmap(render(preview_resample), position, anchor)
+            self._preview_key = cache_key
+        if fast:
+            return False
+
+        def on_done(rendered_image):
+            self.render_cache.put(cache_key, rendered_image)
+            self._show_bitmap(rendered_image, position, anchor)
+
+        self.render_worker.submit(render, on_done)
+        return True
+
+    def _show_pixel_art(self, display_size, origin, canvas_size):
+        """Exibe a imagem no modo pixel art, recortada para a área visível"""
+        scale = display_size[0] / self.loaded_image.width
+        if self.viewport_rendering:
+            image_center = (origin[0] + display_size[0] / 2, origin[1] + display_size[1] / 2)
+            region = ImageProcessor.calculate_visible_region(display_size, canvas_size, image_center)
+        else:
+            region = (0, 0, display_size[0], display_size[1])
+        if region is None:
+            self.display_surface.hide()
+            self.tile_renderer.remove_items()
+            self._render_path = None
+            return
+        bitmap = ImageProcessor.render_region_integer(self.loaded_image, scale, region)
+        self._show_bitmap(bitmap, (origin[0] + region[0], origin[1] + region[1]), "nw")
+
+    def _show_animation(self, display_size, position):
+        """Exibe a animação em reprodução no tamanho e posição atuais"""
+        self.display_surface.hide()
+        self.tile_renderer.remove_items()
+        self._render_path = "animation"
+        self._preview_key = None
+        self._pan_image_id = self.animation_player.set_view((display_size, self.pixel_art_mode), position)
+
+    def render_animation_frame(self, frame):
+        """Renderiza um quadro da animação no tamanho exibido (uma vez por zoom/tamanho)
+        
+        Args:
+            frame: Quadro original da animação
+        
+        Returns:
+            Image: Bitmap pronto para exibição
+        """
+        display_size = self._display_size
+        if display_size == frame.size:
+            return frame
+        if self.pixel_art_mode:
+            return ImageProcessor.render_region_integer(
+                frame, display_size[0] / frame.width, (0, 0, display_size[0], display_size[1])
+            )
+        return frame.resize(display_size, Image.Resampling.LANCZOS)
+
+    def _show_bitmap(self, bitmap, position, anchor):
+        """Coloca no canvas um bitmap já renderizado (único trabalho da thread principal)"""
+        if self._render_path == "tiles":
+            self.tile_renderer.remove_items()
+        self._render_path = "single"
+        self._preview_key = None
+        # Reaproveita o item do canvas e o PhotoImage do mesmo tamanho
+        self._pan_image_id = self.display_surface.show(bitmap, position, anchor)
+
     def set_loading(self, is_loading):
         """Atualiza o estado de carregamento da interface"""
         if is_loading:
@@ -2364,93 +2806,111 @@ class ImageEditorApp(ctk.CTk):
 
     def threaded_load_image(self, path):
         from db import update_last_opened
+        # A animação anterior é parada aqui, na thread principal
+        self.stop_animation()
+        self.set_loading(True)
+
         def task():
-            self.set_loading(True)
+            # Só a decodificação roda aqui; a imagem é entregue à thread principal,
+            # que é quem mexe no cache de renderização e na geração da imagem
             try:
-                self.image_path = path
                 try:
                     # Load the image and check if it's animated
-                    img = Image.open(self.image_path)
-                    
-                    # Reset animation variables
-                    self.is_animated = False
-                    self.animation_frames = []
-                    self.current_frame = 0
-                    self.animation_running = False
+                    img = Image.open(path)
+                    frames = None
                     
                     # Check if this is an animated GIF
                     if getattr(img, "is_animated", False):
-                        self.is_animated = True
-                        self.animation_frames = []
-                        
-                        # Get animation speed from the first frame
-                        self.animation_speed = img.info.get('duration', 100)
-                        
-                        # Load all frames
+                        # Os quadros são decodificados sob demanda, à frente da reprodução
                         try:
-                            for i in range(img.n_frames):
-                                img.seek(i)
-                                self.animation_frames.append(img.copy())
+                            img.close()
+                            frames = LazyFrameSource(path)
                             
                             # Set the first frame as the loaded image
-                            self.loaded_image = self.animation_frames[0]
-                            
-                            # Start animation if we have frames
-                            if self.animation_frames:
-                                self.animation_running = True
-                                self.animate_gif()
+                            image = frames.get_frame(0)
                         except Exception as e:
                             print(f"Error loading animation frames: {e}")
                             # Fallback to static image
-                            self.is_animated = False
-                            self.loaded_image = img.copy()
+                            if frames is not None:
+                                frames.close()
+                                frames = None
+                            image = Image.open(path).copy()
                     else:
                         # Regular non-animated image
-                        self.loaded_image = img.copy()
+                        image = img.copy()
                     
                 except (FileNotFoundError, UnidentifiedImageError) as e:
-                    messagebox.showerror("Erro ao abrir imagem", str(e))
+                    message = str(e)
+                    self.after(0, lambda: messagebox.showerror("Erro ao abrir imagem", message))
                     return
 
-                # Atualiza a interface
-                self.after(0, lambda: self.title(f"PixelArt Image Editor - {os.path.basename(self.image_path)}"))
-                
-                view_state = load_view_state(self.image_path)
-                if view_state:
-                    self.zoom_level, scroll_x, scroll_y, self.fit_mode = view_state
-                else:
-                    self.zoom_level = self.get_fit_zoom()
-                
-                # Usa after para atualizar a interface na thread principal
-                self.after(0, lambda: self.display_image())
-                
-                if view_state:
-                    self.after(0, lambda: [
-                        self.canvas.xview_moveto(scroll_x),
-                        self.canvas.yview_moveto(scroll_y)
-                    ])
-                
-                self.after(0, lambda: self.update_status_bar())
-                update_last_opened(self.image_path)
+                self.after(0, lambda: self._finish_load_image(path, image, frames))
+                update_last_opened(path)
                 
             finally:
                 self.after(0, lambda: self.set_loading(False))
                 
         threading.Thread(target=task, daemon=True).start()
 
+    def _finish_load_image(self, path, image, frames):
+        """Instala a imagem carregada por threaded_load_image (na thread principal)
+        
+        Args:
+            path: Caminho da imagem
+            image: Imagem (ou primeiro quadro da animação) decodificada
+            frames: LazyFrameSource da animação, ou None para imagens estáticas
+        """
+        self.image_path = path
+        
+        # Reset animation variables and pan
+        self.view_center = (0.5, 0.5)
+        self.current_frame = 0
+        self.loaded_image = image
+        if frames is not None:
+            self.is_animated = True
+            self.animation_speed = frames.default_duration
+            self.animation_frames = frames
+            self.animation_running = True
+
+        # Atualiza a interface
+        self.title(f"PixelArt Image Editor - {os.path.basename(path)}")
+        
+        view_state = load_view_state(path)
+        if view_state:
+            self.zoom_level, scroll_x, scroll_y, self.fit_mode = view_state
+        else:
+            self.zoom_level = self.get_fit_zoom()
+        
+        if frames is not None:
+            # Start animation (já exibe o primeiro quadro)
+            self.animate_gif()
+        else:
+            self.display_image()
+
+        # Constrói a pirâmide de resoluções em segundo plano
+        self.ensure_image_pyramid()
+        
+        if view_state:
+            self.canvas.xview_moveto(scroll_x)
+            self.canvas.yview_moveto(scroll_y)
+        
+        self.update_status_bar()
+
     def animate_gif(self):
+        """Inicia a reprodução da animação carregada"""
         if not self.is_animated or not self.animation_running or not self.animation_frames:
             return
-            
-        # Move to next frame
-        self.current_frame = (self.current_frame + 1) % len(self.animation_frames)
-        self.loaded_image = self.animation_frames[self.current_frame]
-        
-        # Display the current frame
+        self.animation_player.play(self.animation_frames, self.render_animation_frame, self.current_frame)
         self.display_image()
-        
-        # Schedule the next frame
-        self.after(self.animation_speed, self.animate_gif)
+
+    def stop_animation(self):
+        """Para a animação e libera a fonte de quadros atual."""
+        self.animation_running = False
+        self.is_animated = False
+        self.animation_player.stop()
+        if isinstance(self.animation_frames, LazyFrameSource):
+            self.animation_frames.close()
+        self.animation_frames = []
     
     def update_status_bar(self):
             if not self.loaded_image or not self.image_path:
@@ -2492,12 +2952,12 @@ class ImageEditorApp(ctk.CTk):
         """Manipula o evento de redimensionamento da janela"""
         if event.widget == self:
             # Atualiza a altura do container do menu após o redimensionamento
-            self.after(100, self.update_toolbar_container_height)
+            self.frame_scheduler.invalidate("toolbar")
             
             # Atualiza a imagem se estiver carregada
             if self.loaded_image:
-                # Agenda a atualização da imagem com um pequeno delay para evitar atualizações excessivas
-                self.after(100, self.refresh_display)
+                # Vários eventos <Configure> no mesmo quadro geram um único redesenho
+                self.frame_scheduler.invalidate("image", "status")
 
     def update_toolbar_container_height(self):
         """Atualiza a altura do container do toolbar para eliminar espaços em branco"""
@@ -2518,7 +2978,7 @@ class ImageEditorApp(ctk.CTk):
     def refresh_display(self):
         """Atualiza a exibição da imagem e a barra de status"""
         if self.loaded_image:
-            self.display_image()
+            self.request_progressive_render()
             self.update_status_bar()
 
     def zoom(self, event):
@@ -2528,14 +2988,30 @@ class ImageEditorApp(ctk.CTk):
             self.zoom_out()
     
     def zoom_in(self):
-        self.zoom_level *= 1.1
-        self.display_image()
-        self.update_status_bar()
+        if self.pixel_art_mode:
+            self.zoom_level = self.get_integer_zoom_step(1)
+        else:
+            self.zoom_level *= 1.1
+        self.frame_scheduler.invalidate("image", "status")
 
     def zoom_out(self):
-        self.zoom_level /= 1.1
-        self.display_image()
-        self.update_status_bar()
+        if self.pixel_art_mode:
+            self.zoom_level = self.get_integer_zoom_step(-1)
+        else:
+            self.zoom_level /= 1.1
+        self.frame_scheduler.invalidate("image", "status")
+
+    def get_integer_zoom_step(self, direction):
+        """Calcula o zoom que leva a escala exibida ao próximo fator inteiro"""
+        if not self.loaded_image:
+            return self.zoom_level
+        base_width, _ = ImageProcessor.calculate_display_size(
+            self.loaded_image.size, self.canvas.winfo_width(), self.canvas.winfo_height(),
+            self.fit_mode, 1.0
+        )
+        base_scale = base_width / self.loaded_image.width
+        new_scale = ImageProcessor.step_integer_scale(base_scale * self.zoom_level, direction)
+        return new_scale / base_scale
 
     def reset_zoom(self):
         self.zoom_level = self.get_fit_zoom()
@@ -2548,13 +3024,11 @@ class ImageEditorApp(ctk.CTk):
             return
             
         # Determina a direção do zoom baseado na direção da rolagem
+        # (zoom_in/zoom_out já agendam a imagem e a barra de status)
         if event.delta > 0:
             self.zoom_in()
         else:
             self.zoom_out()
-        
-        # Atualiza a visualização
-        self.update_status_bar()
 
     def get_fit_zoom(self):
         canvas_width = self.canvas.winfo_width()
@@ -2591,14 +3065,205 @@ class ImageEditorApp(ctk.CTk):
 
             self.loaded_image = Image.open(self.image_path)
             self.image_modified = False
+            self.view_center = (0.5, 0.5)
             self.zoom_level = self.get_fit_zoom()
             self.display_image()
             self.update_status_bar()
         else:
             self.title("PixelArt Image Editor - Nenhuma Imagem") # Set a default title
 
+    def toggle_pixel_art_mode(self):
+        """Alterna o modo pixel art (zoom inteiro, sem suavização)"""
+        self.pixel_art_mode = not self.pixel_art_mode
+        save_global_preferences("pixel_art_mode", "1" if self.pixel_art_mode else "0")
+        if self.loaded_image:
+            self.display_image()
+            self.update_status_bar()
+
+    def toggle_viewport_rendering(self):
+        """Alterna entre renderizar só a área visível e a imagem inteira"""
+        self.viewport_rendering = not self.viewport_rendering
+        save_global_preferences("render_viewport_only", "1" if self.viewport_rendering else "0")
+        if self.loaded_image:
+            self.display_image()
+
+    def queue_filter(self, filter_name, value):
+        """Guarda o valor mais recente de um slider e agenda sua prévia no próximo quadro"""
+        self._pending_filter = (filter_name, value)
+        self.frame_scheduler.invalidate("filter")
+
+    def _apply_pending_filter(self):
+        """Mostra a prévia apenas do último valor de slider recebido no quadro"""
+        if self._pending_filter is None:
+            return
+        filter_name, value = self._pending_filter
+        self._pending_filter = None
+        self.preview_filter(filter_name, value)
+
+    def _filter_kwargs(self, filter_name, value):
+        """Converte o valor do slider nos argumentos de run_filter"""
+        if filter_name == "pixelate":
+            return {"pixel_size": int(value)}
+        return {"value": value}
+
+    def get_adjustment_stack(self):
+        """Retorna a pilha de ajustes da imagem atual
+        
+        Se a imagem mudou por outro caminho (abertura, rotação, efeito, histórico),
+        ela passa a ser a nova base, sem etapas.
+        """
+        if self.adjustments is None or self._adjustments_generation != self.image_generation:
+            # Brilho, contraste e saturação seguidos viram uma única tabela de cores
+            self.adjustments = AdjustmentStack(self.loaded_image, fusable=FUSABLE_FILTERS, fused=apply_adjustments)
+            self._adjustments_generation = self.image_generation
+        return self.adjustments
+
+    def _stage_applier(self, scale=1.0, token=None):
+        """Função que aplica uma etapa da pilha de ajustes com run_filter"""
+        def apply(name, image, params):
+            return self.run_filter(name, image, scale=scale, token=token, **params)[0]
+        return apply
+
+    def get_filter_proxy(self):
+        """Retorna a área visível da imagem base na resolução da tela, para prévias de filtros
+        
+        Returns:
+            tuple: (pilha de ajustes sobre a prévia, posição no canvas, escala) ou None
+        """
+        if not self.loaded_image or not self._display_size or not self._image_center:
+            return None
+        stack = self.get_adjustment_stack()
+        canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        key = (self.image_generation, self._display_size, self._image_center, canvas_size)
+        if self._filter_proxy is not None and self._filter_proxy[0] == key:
+            return self._filter_proxy[1:]
+
+        display_size = self._display_size
+        region = ImageProcessor.calculate_visible_region(display_size, canvas_size, self._image_center)
+        if region is None:
+            return None
+        scale = display_size[0] / self.loaded_image.width
+        # Sem etapas, a base é a própria imagem carregada e a pirâmide pode ser usada
+        source = self.get_display_source(scale) if stack.base is self.loaded_image else stack.base
+        resample = Image.Resampling.NEAREST if self.pixel_art_mode else Image.Resampling.BOX
+        proxy = ImageProcessor.render_region(source, display_size, region, resample)
+        origin = (
+            self._image_center[0] - display_size[0] / 2 + region[0],
+            self._image_center[1] - display_size[1] / 2 + region[1]
+        )
+        self._filter_proxy = (key, stack.rebase(proxy), origin, scale)
+        return self._filter_proxy[1:]
+
+    def preview_filter(self, filter_name, value):
+        """Aplica os ajustes só à área visível reduzida enquanto o slider se move
+        
+        A prévia recalcula a pilha de ajustes a partir da etapa alterada, em
+        segundo plano, e um valor novo cancela o anterior; a imagem carregada
+        não muda. O resultado em resolução total é calculado quando o slider
+        é solto (commit_filter).
+        """
+        if not self.loaded_image:
+            return
+        self._filter_preview = (filter_name, value)
+        proxy = self.get_filter_proxy()
+        if proxy is None:
+            return
+        proxy_stack, origin, scale = proxy
+        stages = self.get_adjustment_stack().with_stage(filter_name, **self._filter_kwargs(filter_name, value))
+        generation = self.image_generation
+
+        def on_done(preview):
+            if generation != self.image_generation:
+                return
+            self.cancel_refinement()
+            self._show_bitmap(preview, origin, "nw")
+
+        self.filter_jobs.submit(
+            "preview",
+            lambda token: proxy_stack.render(self._stage_applier(scale, token), stages, token),
+            on_done,
+            lambda e: print(f"Erro na prévia de {filter_name}: {e}")
+        )
+
+    def commit_filter(self, filter_name):
+        """Calcula em segundo plano os ajustes em resolução total com o último valor da prévia"""
+        # Um valor ainda não exibido também vale
+        self.frame_scheduler.flush()
+        if self._filter_preview is None or self._filter_preview[0] != filter_name or not self.loaded_image:
+            return
+        filter_name, value = self._filter_preview
+        self._filter_preview = None
+        kwargs = self._filter_kwargs(filter_name, value)
+        stack = self.get_adjustment_stack()
+        stack.set_stage(filter_name, **kwargs)
+        stages = stack.stages
+        generation = self.image_generation
+
+        described = self.describe_filter(filter_name, **kwargs)
+
+        def job(token):
+            return (stack.render(self._stage_applier(token=token), stages, token),) + described
+
+        # Uma prévia atrasada não deve aparecer sobre o resultado final
+        self.filter_jobs.cancel("preview")
+        self.filter_jobs.submit(
+            "commit",
+            job,
+            lambda result: self._finish_filter(generation, result),
+            lambda e: messagebox.showerror("Erro de Filtro", f"Erro ao aplicar {filter_name}: {str(e)}")
+        )
+
+    def apply_lut_file(self):
+        """Aplica à imagem uma tabela de cores lida de um arquivo .cube"""
+        if not self.loaded_image:
+            messagebox.showwarning("Aviso", "Nenhuma imagem carregada para aplicar filtro.")
+            return
+        path = filedialog.askopenfilename(filetypes=[("LUT .cube", "*.cube"), ("Todos os arquivos", "*.*")])
+        if not path:
+            return
+        try:
+            lut = ColorLUT.load_cube(path)
+            processed_image = lut.apply(self.loaded_image)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro de Filtro", f"Erro ao aplicar a LUT: {str(e)}")
+            return
+        self._commit_filter_result(
+            processed_image,
+            {'name': 'lut', 'path': path},
+            f"Aplicada LUT: {os.path.basename(path)}"
+        )
+
+    def export_adjustments_lut(self):
+        """Grava os ajustes de cor dos sliders (brilho, contraste, saturação) em um arquivo .cube"""
+        if not self.loaded_image:
+            return
+        stack = self.get_adjustment_stack()
+        stages = [(name, dict(params)) for name, params in stack.stages if name in FUSABLE_FILTERS]
+        if not stages:
+            messagebox.showinfo("Exportar LUT", "Nenhum ajuste de brilho, contraste ou saturação aplicado.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".cube", filetypes=[("LUT .cube", "*.cube")])
+        if not path:
+            return
+        try:
+            compile_adjustments(stages, stack.base).save_cube(path)
+        except OSError as e:
+            messagebox.showerror("Exportar LUT", str(e))
+
+    def _finish_filter(self, generation, result):
+        """Aplica o resultado em resolução total, se a imagem ainda for a mesma"""
+        if generation != self.image_generation:
+            # A imagem mudou por outro caminho: descarta o resultado e a prévia
+            self.display_image()
+            return
+        if result is not None:
+            self._commit_filter_result(*result)
+            # A imagem nova é o resultado da pilha; a base continua a original
+            self._adjustments_generation = self.image_generation
+
     def set_fit_mode(self, mode):
         self.fit_mode = mode
+        self.view_center = (0.5, 0.5)
         self.zoom_level = self.get_fit_zoom()
         self.display_image()
         self.update_status_bar()
@@ -2692,7 +3357,7 @@ class ImageEditorApp(ctk.CTk):
 
     def on_exit(self):
         # Stop animation before exiting
-        self.animation_running = False
+        self.stop_animation()
         
         if not self.loaded_image:
             if self.image_path:
@@ -2725,36 +3390,80 @@ class ImageEditorApp(ctk.CTk):
             self.monitor_window = MonitorWindow(self)
 
     def analyze_palette(self):
-        """Analisa a paleta de cores da imagem"""
+        """Analisa a paleta de cores da imagem em segundo plano (clicar de novo cancela)"""
         if not self.loaded_image:
             messagebox.showwarning(
                 "Sem Imagem",
                 "Por favor, abra uma imagem primeiro!"
             )
             return
-            
-        try:
-            # Inicia análise
-            self.status_bar.configure(text="Analisando cores da imagem...")
-            self.update_idletasks()
-            
-            # Realiza análise avançada
-            color_freq, color_clusters, quantized = ImageProcessor.analyze_image_colors_advanced(self.loaded_image)
-            
-            # Atualiza status
-            self.status_bar.configure(text=f"Análise concluída! {len(color_freq)} cores dominantes encontradas em {len(color_clusters)} grupos.")
-            
-            # Mostra a janela de paleta
-            if hasattr(self, 'palette_window') and self.palette_window is not None:
-                self.palette_window.destroy()
-            self.palette_window = ColorPaletteWindow(self, color_freq, color_clusters, quantized)
-            
-        except Exception as e:
+        
+        if self.filter_jobs.is_busy("palette"):
+            self.filter_jobs.cancel("palette")
+            self.status_bar.configure(text="Análise de paleta cancelada.")
+            return
+        
+        # A mesma imagem já analisada nesta sessão: mostra o resultado direto
+        if self._palette_result is not None and self._palette_result[0] == self.image_generation:
+            self.show_palette(self._palette_result[1], cached=True)
+            return
+        
+        image = self.loaded_image
+        generation = self.image_generation
+        self._palette_progress = ("Calculando hash da imagem", 0.0)
+        
+        def report(message, fraction):
+            # Lido pela thread principal em _poll_palette_progress
+            self._palette_progress = (message, fraction)
+        
+        def job(token):
+            content_hash = image_content_hash(image, token)
+            cached = load_palette(content_hash)
+            if cached is not None:
+                return cached, True
+            token.check()
+            result = ImageProcessor.analyze_image_colors_advanced(image, report, token)
+            report("Gravando no cache", 0.95)
+            save_palette(content_hash, *result)
+            return result, False
+        
+        def on_done(outcome):
+            if generation != self.image_generation:
+                return
+            result, cached = outcome
+            self._palette_result = (generation, result)
+            self.show_palette(result, cached)
+        
+        def on_error(error):
             messagebox.showerror(
                 "Erro",
-                f"Erro ao analisar paleta de cores: {str(e)}"
+                f"Erro ao analisar paleta de cores: {str(error)}"
             )
             self.status_bar.configure(text="Erro ao analisar paleta de cores.")
+        
+        self.filter_jobs.submit("palette", job, on_done, on_error)
+        self._poll_palette_progress()
+    
+    def _poll_palette_progress(self):
+        """Mostra o andamento da análise de paleta na barra de status"""
+        if not self.filter_jobs.is_busy("palette"):
+            return
+        message, fraction = self._palette_progress
+        self.status_bar.configure(
+            text=f"Analisando cores da imagem: {message}... {fraction * 100:.0f}% (clique em Analisar Paleta para cancelar)"
+        )
+        self.after(100, self._poll_palette_progress)
+    
+    def show_palette(self, result, cached=False):
+        """Abre a janela de paleta com o resultado de uma análise"""
+        color_freq, color_clusters, quantized = result
+        origin = " (do cache)" if cached else ""
+        self.status_bar.configure(text=f"Análise concluída{origin}! {len(color_freq)} cores dominantes encontradas em {len(color_clusters)} grupos.")
+        
+        # Mostra a janela de paleta
+        if hasattr(self, 'palette_window') and self.palette_window is not None:
+            self.palette_window.destroy()
+        self.palette_window = ColorPaletteWindow(self, color_freq, color_clusters, quantized)
 
     def toggle_fullscreen(self, event=None):
         """Alterna entre modo tela cheia e normal"""
@@ -2778,7 +3487,7 @@ class ImageEditorApp(ctk.CTk):
         
         # Atualiza a exibição da imagem para se ajustar ao novo tamanho
         if self.loaded_image:
-            self.display_image()
+            self.request_progressive_render()
 
     def exit_fullscreen(self):
         """Sai do modo tela cheia"""
@@ -2793,6 +3502,13 @@ class ImageEditorApp(ctk.CTk):
     def close_image(self):
         """Fecha a imagem atualmente carregada"""
         if self.loaded_image:
+            self.frame_scheduler.cancel()
+            self.cancel_refinement()
+            self.tile_renderer.clear()
+            self.display_surface.clear()
+            self._render_path = None
+            self.stop_animation()
+            self.filter_jobs.cancel("palette")
             self.loaded_image = None
             self.image_path = None
             self.canvas.delete("all")
@@ -2863,100 +3579,135 @@ class ImageEditorApp(ctk.CTk):
             messagebox.showwarning("Aviso", "Nenhuma imagem carregada para aplicar filtro.")
             return
 
-        # É uma boa prática trabalhar com uma cópia para não alterar a original diretamente
-        # até ter certeza que o filtro foi aplicado com sucesso.
-        # No entanto, para economizar memória em operações simples, podemos aplicar diretamente
-        # e usar o histórico para reverter se necessário.
-        # original_image = self.loaded_image.copy() # Descomente se preferir mais segurança
-
-        processed_image = None
-        action_data = {'name': effect_name} # Para o histórico
-        description = f"Aplicado: {effect_name}" # Descrição padrão para o histórico
-
         try:
-            # --- Ajustes (geralmente com um valor numérico) ---
-            if effect_name == "brightness":
-                if value is None: value = 1.0 # Valor padrão ou último valor
-                processed_image = image_filters.adjust_brightness(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Ajuste de Brilho: {float(value):.2f}"
-            elif effect_name == "contrast":
-                if value is None: value = 1.0
-                processed_image = image_filters.adjust_contrast(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Ajuste de Contraste: {float(value):.2f}"
-            elif effect_name == "saturation":
-                if value is None: value = 1.0
-                processed_image = image_filters.adjust_saturation(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Ajuste de Saturação: {float(value):.2f}"
-            elif effect_name == "sharpness":
-                if value is None: value = 1.0
-                processed_image = image_filters.adjust_sharpness(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Ajuste de Nitidez: {float(value):.2f}"
-
-            # --- Efeitos (geralmente sem valor numérico extra) ---
-            elif effect_name == "grayscale":
-                processed_image = image_filters.apply_grayscale(self.loaded_image)
-                description = "Aplicado filtro: Escala de Cinza"
-            elif effect_name == "sepia":
-                processed_image = image_filters.apply_sepia(self.loaded_image)
-                description = "Aplicado filtro: Sépia"
-            elif effect_name == "negative":
-                processed_image = image_filters.apply_negative(self.loaded_image)
-                description = "Aplicado filtro: Negativo"
-            elif effect_name == "pixelate":
-                # Precisa de um valor (pixel_size), pode vir de um input ou slider
-                # Vamos usar um valor fixo por enquanto ou pegar de kwargs
-                pixel_size = kwargs.get('pixel_size', 8) # Default a 8
-                processed_image = image_filters.apply_pixelate(self.loaded_image, pixel_size)
-                action_data['pixel_size'] = pixel_size
-                description = f"Aplicado filtro: Pixelate (Tamanho: {pixel_size})"
-            elif effect_name == "vintage":
-                processed_image = image_filters.apply_vintage(self.loaded_image)
-                description = "Aplicado filtro: Vintage"
-            # --- Filtros de suavização e realce ---
-            elif effect_name == "smooth":
-                if value is None: value = 1.0
-                processed_image = image_filters.apply_smooth(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Aplicado filtro: Suavização ({float(value):.2f})"
-            elif effect_name == "enhance":
-                if value is None: value = 1.0
-                processed_image = image_filters.apply_enhance(self.loaded_image, float(value))
-                action_data['value'] = float(value)
-                description = f"Aplicado filtro: Vivacidade de Cor ({float(value):.2f})"
-            else:
+            result = self.run_filter(effect_name, self.loaded_image, value, **kwargs)
+            if result is None:
                 print(f"Filtro/Efeito desconhecido: {effect_name}")
-                # self.loaded_image = original_image # Reverte se usou cópia
                 return
-
-            # Se a imagem foi processada com sucesso
-            if processed_image:
-                # Atualiza a imagem na UI
-                self.loaded_image = processed_image
-                self.image_modified = True # Marca como modificada
-                self.display_image()
-                self.update_status_bar()
-
-                # Adiciona ao histórico (se o history_ui existir)
-                if hasattr(self, 'history_ui') and hasattr(self.history_ui, 'history_manager'):
-                    self.history_ui.history_manager.add_action(
-                        action_type='filter_effect', # Tipo genérico para filtros/efeitos
-                        action_data=action_data, # Salva o nome e parâmetros aplicados
-                        description=description  # Descrição da ação
-                    )
-                else:
-                     print("Aviso: history_ui ou history_manager não encontrado para registrar ação.")
-
+            self._commit_filter_result(*result)
 
         except Exception as e:
             messagebox.showerror("Erro de Filtro", f"Erro ao aplicar {effect_name}: {str(e)}")
-            # self.loaded_image = original_image # Reverte para original em caso de erro, se usou cópia
-            # self.display_image() # Reexibe a original
             self.update_status_bar() # Atualiza status bar mesmo em erro
 
+    def describe_filter(self, effect_name, value=None, **kwargs):
+        """Monta os dados do histórico e a descrição de um filtro, sem executá-lo
+        
+        Args:
+            effect_name: Nome do filtro ou efeito
+            value: Valor opcional para filtros ajustáveis
+        
+        Returns:
+            tuple: (dados para o histórico, descrição), ou None se o filtro for desconhecido
+        """
+        action_data = {'name': effect_name} # Para o histórico
+        value = 1.0 if value is None else float(value) # Valor padrão ou último valor
+
+        # --- Ajustes (geralmente com um valor numérico) ---
+        adjustments = {
+            "brightness": "Ajuste de Brilho: {:.2f}",
+            "contrast": "Ajuste de Contraste: {:.2f}",
+            "saturation": "Ajuste de Saturação: {:.2f}",
+            "sharpness": "Ajuste de Nitidez: {:.2f}",
+            # --- Filtros de suavização e realce ---
+            "smooth": "Aplicado filtro: Suavização ({:.2f})",
+            "enhance": "Aplicado filtro: Vivacidade de Cor ({:.2f})",
+        }
+        # --- Efeitos (geralmente sem valor numérico extra) ---
+        effects = {
+            "grayscale": "Aplicado filtro: Escala de Cinza",
+            "sepia": "Aplicado filtro: Sépia",
+            "negative": "Aplicado filtro: Negativo",
+            "vintage": "Aplicado filtro: Vintage",
+        }
+        if effect_name in adjustments:
+            action_data['value'] = value
+            return action_data, adjustments[effect_name].format(value)
+        if effect_name in effects:
+            return action_data, effects[effect_name]
+        if effect_name == "pixelate":
+            pixel_size = kwargs.get('pixel_size', 8) # Default a 8
+            action_data['pixel_size'] = pixel_size
+            return action_data, f"Aplicado filtro: Pixelate (Tamanho: {pixel_size})"
+        return None
+
+    def run_filter(self, effect_name, image, value=None, scale=1.0, token=None, **kwargs):
+        """Executa um filtro ou efeito sobre uma imagem (não altera a interface)
+        
+        Pode rodar fora da thread principal.
+        
+        Args:
+            effect_name: Nome do filtro ou efeito
+            image: Imagem de entrada (original ou prévia reduzida)
+            value: Valor opcional para filtros ajustáveis
+            scale: Escala da imagem de entrada em relação à original
+                (ajusta parâmetros medidos em pixels, como o tamanho do pixelate)
+            token: Token de cancelamento; filtros pixel a pixel o verificam entre faixas
+        
+        Returns:
+            tuple: (imagem processada, dados para o histórico, descrição), ou
+                None se o filtro for desconhecido
+        """
+        described = self.describe_filter(effect_name, value, **kwargs)
+        if described is None:
+            return None
+        if token is not None:
+            token.check()
+        value = 1.0 if value is None else float(value)
+
+        # --- Ajustes ---
+        if effect_name == "brightness":
+            processed_image = apply_in_strips(image, lambda im: image_filters.adjust_brightness(im, value), token)
+        elif effect_name == "contrast":
+            processed_image = image_filters.adjust_contrast(image, value)
+        elif effect_name == "saturation":
+            processed_image = apply_in_strips(image, lambda im: image_filters.adjust_saturation(im, value), token)
+        elif effect_name == "sharpness":
+            processed_image = image_filters.adjust_sharpness(image, value)
+
+        # --- Efeitos ---
+        elif effect_name == "grayscale":
+            processed_image = apply_in_strips(image, image_filters.apply_grayscale, token)
+        elif effect_name == "sepia":
+            processed_image = apply_in_strips(image, image_filters.apply_sepia, token)
+        elif effect_name == "negative":
+            processed_image = apply_in_strips(image, image_filters.apply_negative, token)
+        elif effect_name == "pixelate":
+            # O tamanho do pixel é medido na imagem original
+            pixel_size = kwargs.get('pixel_size', 8)
+            processed_image = image_filters.apply_pixelate(image, max(1, round(pixel_size * scale)))
+        elif effect_name == "vintage":
+            processed_image = image_filters.apply_vintage(image)
+        # --- Filtros de suavização e realce ---
+        elif effect_name == "smooth":
+            processed_image = image_filters.apply_smooth(image, value)
+        else:  # enhance
+            processed_image = image_filters.apply_enhance(image, value)
+
+        if token is not None:
+            token.check()
+        return (processed_image,) + described
+
+    def _commit_filter_result(self, processed_image, action_data, description):
+        """Substitui a imagem pelo resultado de um filtro e registra no histórico"""
+        if not processed_image:
+            return
+        # Atualiza a imagem na UI
+        self.loaded_image = processed_image
+        self.image_modified = True # Marca como modificada
+        self.display_image()
+        self.update_status_bar()
+
+        # Adiciona ao histórico (se o history_ui existir)
+        if hasattr(self, 'history_ui') and hasattr(self.history_ui, 'history_manager'):
+            self.history_ui.history_manager.add_action(
+                action_type='filter_effect', # Tipo genérico para filtros/efeitos
+                action_data=action_data, # Salva o nome e parâmetros aplicados
+                description=description  # Descrição da ação
+            )
+        else:
+             print("Aviso: history_ui ou history_manager não encontrado para registrar ação.")
+
 if __name__ == "__main__":
     init_db()
     app = ImageEditorApp()
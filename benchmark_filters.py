@@ -0,0 +1,532 @@
+# file: benchmark_filters.py
+"""
+Medições de desempenho dos filtros e do ImageProcessor (sem interface gráfica).
+
+Roda todos os filtros, caminhos de redimensionamento e funções de análise de
+cor sobre um corpus sintético reproduzível (64x64 até 8k; modos 1, L, P, RGB
+e RGBA; GIFs animados) e grava tempo, vazão e pico de memória residente em JSON.
+Comparado a um resultado anterior, termina com código 1 se algum caso
+ficou mais lento ou consumiu mais memória do que o limite.
+
+Uso:
+    python benchmark_filters.py [--corpus quick|standard|full] [--repeat 3] [--only sepia]
+                                [--output resultados.json] [--baseline anterior.json] [--threshold 0.15]
+    python benchmark_filters.py --sepia [--size 1024x768]
+    python benchmark_filters.py --tiled [--size 4096x3072]
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+import PIL
+
+import image_filters
+from animation_frames import CompactFrameStore
+from color_lut import apply_adjustments
+from image_processor import ImageProcessor
+from image_pyramid import ImagePyramid
+from tiled_executor import run_tiled
+
+# Tamanhos de cada corpus; todos os modos são gerados para cada tamanho
+CORPUS_SIZES = {
+    "quick": [(64, 64), (256, 256), (1024, 768)],
+    "standard": [(64, 64), (256, 256), (1024, 768), (1920, 1080), (3840, 2160)],
+    "full": [(64, 64), (256, 256), (1024, 768), (1920, 1080), (3840, 2160), (7680, 4320)],
+}
+CORPUS_MODES = ("1", "L", "P", "RGB", "RGBA")
+
+# GIFs animados de cada corpus: (lado, quadros)
+CORPUS_ANIMATIONS = {
+    "quick": [(128, 16)],
+    "standard": [(128, 16), (512, 60)],
+    "full": [(128, 16), (512, 60), (1024, 120)],
+}
+
+# Abaixo destes valores a diferença é ruído de medição, não regressão
+MIN_SECONDS_DELTA = 0.002
+MIN_PEAK_MB_DELTA = 1.0
+
+# Intervalo entre as leituras da memória residente durante a medição de pico
+RSS_SAMPLE_INTERVAL = 0.001
+
+
+def sepia_loop(image):
+    """Implementação antiga do sépia, pixel a pixel em Python (referência de comparação)."""
+    sepia_image = image.convert("RGB")
+    width, height = sepia_image.size
+    pixels = sepia_image.load()
+    for py in range(height):
+        for px in range(width):
+            r, g, b = pixels[px, py]
+            tr = int(0.393 * r + 0.769 * g + 0.189 * b)
+            tg = int(0.349 * r + 0.686 * g + 0.168 * b)
+            tb = int(0.272 * r + 0.534 * g + 0.131 * b)
+            pixels[px, py] = (min(tr, 255), min(tg, 255), min(tb, 255))
+    return sepia_image
+
+
+def make_test_image(size, seed=0):
+    """Gera uma imagem RGB reproduzível (gradiente com ruído)."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    noise = rng.integers(0, 32, (height, width, 3), dtype=np.uint8)
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=2).astype(np.uint8)
+    return Image.fromarray(base + noise)
+
+
+def make_corpus_image(size, mode, seed=0):
+    """Gera a imagem de teste no modo pedido (P com paleta adaptativa, RGBA com alfa em gradiente)."""
+    image = make_test_image(size, seed)
+    if mode == "RGBA":
+        alpha = np.linspace(0, 255, size[0], dtype=np.float32)[None, :].repeat(size[1], axis=0)
+        image.putalpha(Image.fromarray(alpha.astype(np.uint8)))
+        return image
+    if mode == "P":
+        return image.quantize(256)
+    return image.convert(mode)
+
+
+def make_animated_gif(side, frames, seed=0) -> bytes:
+    """Gera um GIF animado reproduzível: fundo fixo e um quadrado que se move (mudança parcial por quadro)."""
+    background = make_test_image((side, side), seed).quantize(255)
+    images = []
+    for i in range(frames):
+        frame = background.copy()
+        offset = (i * side // max(1, frames)) % side
+        ImageDraw.Draw(frame).rectangle((offset, offset, offset + side // 8, offset + side // 8), fill=255)
+        images.append(frame)
+    buffer = io.BytesIO()
+    images[0].save(buffer, "GIF", save_all=True, append_images=images[1:], duration=40, loop=0)
+    return buffer.getvalue()
+
+
+def iter_corpus(preset="quick", seed=0) -> Iterator[Tuple[str, Image.Image]]:
+    """Gera as imagens do corpus, uma de cada vez (as de 8k não ficam todas em memória)."""
+    for size in CORPUS_SIZES[preset]:
+        for mode in CORPUS_MODES:
+            yield f"{size[0]}x{size[1]}_{mode}", make_corpus_image(size, mode, seed)
+
+
+class Case(NamedTuple):
+    """Um caso de medição; prepare (fora da medição) gera a entrada de run a partir da imagem."""
+    name: str
+    run: Callable
+    prepare: Optional[Callable] = None
+    max_pixels: Optional[int] = None  # imagens maiores são puladas (implementações ainda lentas)
+
+
+def _build_pyramid(image):
+    pyramid = ImagePyramid(image)
+    pyramid.build_async()
+    pyramid.wait()
+    return pyramid
+
+
+def _quantized_frequency(image):
+    return ImageProcessor.get_color_frequency(ImageProcessor.quantize_colors(image))
+
+
+def _all_colors(image):
+    return ImageProcessor.get_color_frequency(image, max_colors=None)
+
+
+def _half(image):
+    return max(1, image.width // 2), max(1, image.height // 2)
+
+
+IMAGE_CASES = [
+    # Filtros
+    Case("filters.adjust_brightness", lambda im: image_filters.adjust_brightness(im, 1.2)),
+    Case("filters.adjust_contrast", lambda im: image_filters.adjust_contrast(im, 1.2)),
+    Case("filters.adjust_saturation", lambda im: image_filters.adjust_saturation(im, 1.2)),
+    Case("filters.adjust_sharpness", lambda im: image_filters.adjust_sharpness(im, 1.5)),
+    Case("filters.apply_color_matrix", lambda im: image_filters.apply_color_matrix(
+        im, image_filters.duotone_matrix((20, 0, 60), (255, 230, 120)))),
+    Case("filters.apply_grayscale", image_filters.apply_grayscale),
+    Case("filters.apply_sepia", image_filters.apply_sepia),
+    Case("filters.apply_negative", image_filters.apply_negative),
+    Case("filters.apply_pixelate", lambda im: image_filters.apply_pixelate(im, 8)),
+    Case("filters.apply_vintage", image_filters.apply_vintage),
+    Case("filters.apply_smooth", lambda im: image_filters.apply_smooth(im, 1.0)),
+    Case("filters.apply_enhance", lambda im: image_filters.apply_enhance(im, 1.0)),
+    Case("filters.apply_adjustments", lambda im: apply_adjustments(
+        im, [("brightness", {"value": 1.1}), ("contrast", {"value": 1.2}), ("saturation", {"value": 0.8})])),
+    # Redimensionamento
+    Case("resize.resize_image", lambda im: ImageProcessor.resize_image(im, *_half(im), keep_aspect=False)),
+    Case("resize.create_thumbnail", lambda im: ImageProcessor.create_thumbnail(im, (256, 256))),
+    Case("resize.apply_zoom", lambda im: ImageProcessor.apply_zoom(im, 0.5)),
+    Case("resize.rotate_image", lambda im: ImageProcessor.rotate_image(im, 15)),
+    Case("resize.render_region", lambda im: ImageProcessor.render_region(
+        im, _half(im), (0, 0, min(1280, _half(im)[0]), min(720, _half(im)[1])))),
+    Case("resize.render_region_integer", lambda im: ImageProcessor.render_region_integer(
+        im, 2.0, (0, 0, min(1280, im.width * 2), min(720, im.height * 2)))),
+    Case("resize.pyramid_build", _build_pyramid),
+    # Análise de cores
+    Case("colors.analyze_image_colors", ImageProcessor.analyze_image_colors),
+    Case("colors.quantize_colors", ImageProcessor.quantize_colors),
+    Case("colors.get_color_frequency", ImageProcessor.get_color_frequency),
+    Case("colors.sort_colors_by_hue", ImageProcessor.sort_colors_by_hue,
+         prepare=lambda im: {color for color, _ in _quantized_frequency(im)}),
+    Case("colors.cluster_colors", ImageProcessor.cluster_colors, prepare=_quantized_frequency),
+    Case("colors.cluster_colors_all_rgb", lambda colors: ImageProcessor.cluster_colors(colors, 10),
+         prepare=_all_colors, max_pixels=1920 * 1080),
+    Case("colors.cluster_colors_all_lab", lambda colors: ImageProcessor.cluster_colors(colors, 5, "lab"),
+         prepare=_all_colors, max_pixels=1920 * 1080),
+    Case("colors.analyze_image_colors_advanced", ImageProcessor.analyze_image_colors_advanced),
+]
+
+
+def _gif_decode(data):
+    with Image.open(io.BytesIO(data)) as image:
+        for index in range(image.n_frames):
+            image.seek(index)
+            image.load()
+
+
+def _gif_compact_store(data):
+    store = CompactFrameStore()
+    with Image.open(io.BytesIO(data)) as image:
+        for index in range(image.n_frames):
+            image.seek(index)
+            store.append(image.copy(), image.info.get("duration", 100), getattr(image, "disposal_method", 0))
+    return store
+
+
+ANIMATION_CASES = [
+    Case("animation.decode_all_frames", _gif_decode),
+    Case("animation.compact_store", _gif_compact_store),
+]
+
+
+def time_call(func, *args, repeat=3):
+    """Retorna o melhor tempo (s) de repeat execuções."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def current_rss() -> Optional[int]:
+    """Memória residente (RSS) atual do processo em bytes, ou None se o sistema não informar."""
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+def _max_rss() -> int:
+    """Maior RSS do processo desde o início, em bytes (resource.getrusage)."""
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # o Linux informa em KB
+
+
+def _release_free_memory():
+    """Devolve ao sistema a memória já liberada, para o RSS de partida não esconder a da execução."""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        import ctypes
+        try:
+            # Sem isto, o glibc reaproveita a memória das execuções de tempo e o pico sai quase zero
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def peak_memory(func, *args) -> float:
+    """
+    Pico de memória residente (MB) acrescentada durante uma execução.
+
+    Mede a memória do processo, não só as alocações do Python: os buffers
+    de pixels do PIL, do NumPy e do OpenCV entram na conta. Uma thread lê o
+    RSS a cada RSS_SAMPLE_INTERVAL enquanto func roda, e o pico é comparado
+    ao RSS de antes da execução. Em sistemas sem leitura do RSS atual, usa o
+    máximo do processo (resource.getrusage), que só acusa execuções que
+    passem do maior pico anterior.
+    """
+    _release_free_memory()
+    start = current_rss()
+    if start is None:
+        before = _max_rss()
+        func(*args)
+        return max(0, _max_rss() - before) / (1024 * 1024)
+
+    peak = start
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            peak = max(peak, current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = func(*args)
+        # Leitura final com o resultado ainda vivo (execuções mais curtas que o intervalo)
+        peak = max(peak, current_rss())
+        del result
+    finally:
+        done.set()
+        sampler.join()
+    return (peak - start) / (1024 * 1024)
+
+
+def measure_case(case: Case, label: str, source, pixels: int, repeat: int = 3) -> dict:
+    """
+    Mede um caso sobre uma entrada.
+
+    Args:
+        case: Caso de medição
+        label: Nome da entrada no corpus
+        source: Imagem (ou dados do GIF) de entrada
+        pixels: Pixels processados por execução (base da vazão)
+        repeat: Número de execuções (vale o melhor tempo)
+
+    Returns:
+        dict: Resultado com tempo, vazão e pico de memória, ou com o erro / motivo do salto
+    """
+    result = {"case": case.name, "image": label, "pixels": pixels}
+    if case.max_pixels is not None and pixels > case.max_pixels:
+        result["skipped"] = f"acima de {case.max_pixels} pixels"
+        return result
+    try:
+        argument = case.prepare(source) if case.prepare else source
+        seconds = time_call(case.run, argument, repeat=repeat)
+        result["seconds"] = seconds
+        # Casos com prepare não processam os pixels da imagem, só o que foi derivado dela
+        result["mpix_per_s"] = pixels / seconds / 1e6 if seconds and not case.prepare else None
+        result["peak_mb"] = peak_memory(case.run, argument)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_suite(preset="quick", repeat=3, only=None, seed=0, progress=None) -> dict:
+    """
+    Roda todos os casos sobre o corpus.
+
+    Args:
+        preset: Corpus (quick, standard ou full)
+        repeat: Execuções por medição
+        only: Se informado, roda só os casos cujo nome contém este texto
+        seed: Semente do corpus
+        progress: Chamada com cada resultado (opcional)
+
+    Returns:
+        dict: {"meta": ambiente e parâmetros, "results": [resultado, ...]}
+    """
+    results = []
+
+    def record(result):
+        results.append(result)
+        if progress:
+            progress(result)
+
+    image_cases = [case for case in IMAGE_CASES if not only or only in case.name]
+    if image_cases:
+        for label, image in iter_corpus(preset, seed):
+            for case in image_cases:
+                record(measure_case(case, label, image, image.width * image.height, repeat))
+
+    animation_cases = [case for case in ANIMATION_CASES if not only or only in case.name]
+    for side, frames in CORPUS_ANIMATIONS[preset] if animation_cases else ():
+        data = make_animated_gif(side, frames, seed)
+        label = f"gif_{side}x{side}x{frames}"
+        for case in animation_cases:
+            record(measure_case(case, label, data, side * side * frames, repeat))
+
+    try:
+        import cv2
+        cv2_version = cv2.__version__
+    except ImportError:
+        cv2_version = None
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "corpus": preset,
+            "repeat": repeat,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pillow": PIL.__version__,
+            "numpy": np.__version__,
+            "opencv": cv2_version,
+            "peak_memory": "rss",
+        },
+        "results": results,
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.15) -> List[str]:
+    """
+    Compara duas execuções da suíte.
+
+    Args:
+        current: Resultado atual de run_suite
+        baseline: Resultado anterior (referência)
+        threshold: Piora relativa tolerada (0.15 = 15%)
+
+    Returns:
+        List[str]: Descrição de cada regressão de tempo ou de memória
+    """
+    previous = {(r["case"], r["image"]): r for r in baseline.get("results", []) if "seconds" in r}
+    # Execuções antigas mediam só as alocações do Python (tracemalloc); não dá para comparar com o RSS
+    same_memory_metric = (baseline.get("meta", {}).get("peak_memory") ==
+                          current.get("meta", {}).get("peak_memory"))
+    regressions = []
+    for result in current.get("results", []):
+        base = previous.get((result["case"], result["image"]))
+        if base is None or "seconds" not in result:
+            continue
+        name = f"{result['case']} [{result['image']}]"
+        seconds, base_seconds = result["seconds"], base["seconds"]
+        if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > MIN_SECONDS_DELTA:
+            regressions.append(f"{name}: tempo {base_seconds * 1000:.1f} -> {seconds * 1000:.1f} ms")
+        peak, base_peak = result.get("peak_mb", 0), base.get("peak_mb", 0)
+        if same_memory_metric and peak > base_peak * (1 + threshold) and peak - base_peak > MIN_PEAK_MB_DELTA:
+            regressions.append(f"{name}: memória {base_peak:.1f} -> {peak:.1f} MB")
+    return regressions
+
+
+def benchmark_color_matrix(size=(1024, 768), repeat=3):
+    """
+    Compara o sépia por matriz de cor com o laço pixel a pixel antigo.
+
+    Args:
+        size: Tamanho da imagem de teste (width, height)
+        repeat: Número de execuções (vale o melhor tempo)
+
+    Returns:
+        dict: Tempos em segundos e o ganho de velocidade
+    """
+    image = make_test_image(size)
+    loop = time_call(sepia_loop, image, repeat=1)  # lento demais para repetir
+    matrix = time_call(image_filters.apply_sepia, image, repeat=repeat)
+    duotone = image_filters.duotone_matrix((20, 0, 60), (255, 230, 120))
+    custom = time_call(image_filters.apply_color_matrix, image, duotone, repeat=repeat)
+    return {
+        "size": f"{size[0]}x{size[1]}",
+        "sepia_loop_s": loop,
+        "sepia_matrix_s": matrix,
+        "duotone_matrix_s": custom,
+        "speedup": loop / matrix if matrix else float("inf"),
+    }
+
+
+def benchmark_tiled(size=(4096, 3072), repeat=1, workers=None):
+    """
+    Mede a suavização e o realce na imagem inteira (1 thread) e em blocos (N threads).
+
+    Args:
+        size: Tamanho da imagem de teste (width, height)
+        repeat: Número de execuções (vale o melhor tempo)
+        workers: Número de threads (padrão: número de núcleos)
+
+    Returns:
+        dict: Tempos em segundos por filtro
+    """
+    image = make_test_image(size)
+    workers = workers or os.cpu_count() or 1
+    result = {"size": f"{size[0]}x{size[1]}", "workers": workers}
+    with ThreadPoolExecutor(max_workers=1) as single, ThreadPoolExecutor(max_workers=workers) as pool:
+        smooth = lambda tile: image_filters._smooth_tile(tile, 1.0)
+        halo = image_filters._smooth_halo(1.0)
+        result["smooth_1_thread_s"] = time_call(
+            lambda: run_tiled(image, smooth, halo, executor=single), repeat=repeat)
+        result["smooth_tiled_s"] = time_call(
+            lambda: run_tiled(image, smooth, halo, executor=pool), repeat=repeat)
+    result["enhance_s"] = time_call(image_filters.apply_enhance, image, repeat=repeat)
+    return result
+
+
+def _parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def _print_result(result):
+    name = f"{result['case']:<40} {result['image']:<20}"
+    if "error" in result:
+        print(f"{name} erro: {result['error']}")
+    elif "skipped" in result:
+        print(f"{name} pulado ({result['skipped']})")
+    else:
+        print(f"{name} {result['seconds'] * 1000:10.2f} ms {result['mpix_per_s'] or 0:9.1f} Mpx/s "
+              f"{result['peak_mb']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos filtros e do ImageProcessor")
+    parser.add_argument("--corpus", choices=sorted(CORPUS_SIZES), default="quick", help="Corpus sintético")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medição")
+    parser.add_argument("--only", help="Roda só os casos cujo nome contém este texto")
+    parser.add_argument("--output", help="Grava os resultados neste arquivo JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Piora relativa tolerada (0.15 = 15%%)")
+    parser.add_argument("--sepia", action="store_true", help="Compara o sépia por matriz com o laço antigo")
+    parser.add_argument("--tiled", action="store_true", help="Compara a execução em blocos com a de 1 thread")
+    parser.add_argument("--size", type=_parse_size, help="Tamanho da imagem de --sepia/--tiled, ex.: 1024x768")
+    args = parser.parse_args()
+
+    if args.sepia:
+        result = benchmark_color_matrix(args.size or (1024, 768), args.repeat)
+        print(f"Imagem: {result['size']}")
+        print(f"Sépia (laço Python):  {result['sepia_loop_s'] * 1000:10.1f} ms")
+        print(f"Sépia (matriz de cor): {result['sepia_matrix_s'] * 1000:9.1f} ms")
+        print(f"Duotone (matriz):      {result['duotone_matrix_s'] * 1000:9.1f} ms")
+        print(f"Ganho: {result['speedup']:.0f}x")
+    if args.tiled:
+        tiled = benchmark_tiled(args.size or (4096, 3072), 1)
+        print(f"Suavização, 1 thread:   {tiled['smooth_1_thread_s'] * 1000:9.1f} ms")
+        print(f"Suavização, {tiled['workers']} threads: {tiled['smooth_tiled_s'] * 1000:9.1f} ms")
+        print(f"Realce (em blocos):     {tiled['enhance_s'] * 1000:9.1f} ms")
+    if args.sepia or args.tiled:
+        sys.exit(0)
+
+    suite = run_suite(args.corpus, args.repeat, args.only, progress=_print_result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(suite, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_results(suite, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSÃO {line}")
+        if regressions:
+            sys.exit(1)
+        print("Nenhuma regressão acima do limite")
@@ -0,0 +1,291 @@
+# file: color_analysis.py
+from collections.abc import Mapping, Set
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from scipy.spatial import cKDTree
+
+# Acima deste número de pixels, indexar por uma tabela de 2^24 posições é mais
+# rápido que ordenar (np.unique com return_inverse)
+_TABLE_MIN_PIXELS = 1 << 22
+
+# Até este número de cores, Image.getcolors (em C) conta mais rápido que o NumPy;
+# acima dele, desiste logo e retorna None
+_GETCOLORS_MAX = 1 << 16
+
+
+def pack_rgb(rgb: np.ndarray) -> np.ndarray:
+    """Empacota cores (..., 3) uint8 em inteiros 0xRRGGBB (uint32)."""
+    rgb = rgb.astype(np.uint32, copy=False)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def unpack_rgb(packed: np.ndarray) -> np.ndarray:
+    """Desempacota inteiros 0xRRGGBB em cores (..., 3) uint8."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1).astype(np.uint8)
+
+
+def to_hex(rgb) -> str:
+    """Formata uma cor (r, g, b) como '#rrggbb'."""
+    return "#{:02x}{:02x}{:02x}".format(*(int(c) for c in rgb))
+
+
+def parse_hex(hex_color: str) -> int:
+    """Converte '#rrggbb' no inteiro empacotado 0xRRGGBB."""
+    return int(hex_color.lstrip("#"), 16)
+
+
+def image_to_packed(image: Image.Image) -> np.ndarray:
+    """Pixels da imagem (convertida para RGB) como array (altura, largura) de inteiros 0xRRGGBB."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return pack_rgb(np.asarray(image))
+
+
+def _smallest_index_dtype(count: int):
+    if count <= 1 << 8:
+        return np.uint8
+    if count <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+class HexColorSet(Set):
+    """
+    Conjunto (somente leitura) de cores '#rrggbb' guardado como inteiros ordenados.
+
+    Compatível com o set de strings hexadecimais usado antes: aceita
+    'in', len, iteração e as operações de conjunto, sem criar uma string por
+    cor até que ela seja pedida.
+    """
+
+    def __init__(self, packed: np.ndarray):
+        """
+        Args:
+            packed: Cores únicas empacotadas (0xRRGGBB), em ordem crescente
+        """
+        self.packed = packed
+
+    def __contains__(self, hex_color) -> bool:
+        try:
+            value = parse_hex(hex_color)
+        except (TypeError, ValueError, AttributeError):
+            return False
+        position = np.searchsorted(self.packed, value)
+        return position < len(self.packed) and self.packed[position] == value
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self.packed.tolist():
+            yield f"#{value:06x}"
+
+    def __len__(self) -> int:
+        return len(self.packed)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # Resultados de operações de conjunto (|, &, -) viram um set comum
+        return set(iterable)
+
+
+class IndexedColorMap(Mapping):
+    """
+    Mapa de cores indexado: um índice por pixel e uma paleta de cores únicas.
+
+    Ocupa 1 a 4 bytes por pixel (contra centenas do dicionário
+    {(x, y): '#rrggbb'} usado antes). Para o código existente, também se
+    comporta como esse dicionário: color_map[(x, y)] retorna a cor em
+    hexadecimal, e len, iteração e items() percorrem os pixels na mesma ordem
+    de antes (coluna a coluna).
+    """
+
+    def __init__(self, indices: np.ndarray, palette: np.ndarray, counts: np.ndarray):
+        """
+        Args:
+            indices: Índice na paleta de cada pixel, array (altura, largura)
+            palette: Cores únicas, array (N, 3) uint8 em ordem crescente de 0xRRGGBB
+            counts: Número de pixels de cada cor da paleta
+        """
+        self.indices = indices
+        self.palette = palette
+        self.counts = counts
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.indices.shape[1], self.indices.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.indices.nbytes + self.palette.nbytes + self.counts.nbytes
+
+    def color_at(self, x: int, y: int) -> Tuple[int, int, int]:
+        """Cor (r, g, b) do pixel."""
+        return tuple(int(c) for c in self.palette[self.indices[y, x]])
+
+    def hex_palette(self) -> list:
+        """Paleta como lista de strings '#rrggbb' (na ordem dos índices)."""
+        return [to_hex(color) for color in self.palette]
+
+    def unique_colors(self) -> HexColorSet:
+        """Conjunto das cores únicas em hexadecimal."""
+        return HexColorSet(pack_rgb(self.palette))
+
+    def to_image(self) -> Image.Image:
+        """Reconstrói a imagem RGB."""
+        return Image.fromarray(self.palette[self.indices])
+
+    # Compatibilidade com o dicionário {(x, y): '#rrggbb'}
+
+    def __getitem__(self, position) -> str:
+        x, y = position
+        width, height = self.size
+        if not (0 <= x < width and 0 <= y < height):
+            raise KeyError(position)
+        return to_hex(self.palette[self.indices[y, x]])
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        width, height = self.size
+        for x in range(width):
+            for y in range(height):
+                yield x, y
+
+    def __len__(self) -> int:
+        return self.indices.size
+
+
+def index_colors(image: Image.Image) -> IndexedColorMap:
+    """
+    Calcula o mapa de cores indexado de uma imagem (convertida para RGB).
+
+    As cores são empacotadas em uint32 e reduzidas às únicas com
+    np.unique(return_inverse=True); em imagens grandes, uma tabela de 2^24
+    posições faz a mesma coisa em tempo linear. A paleta sai em ordem
+    crescente de 0xRRGGBB nos dois casos.
+
+    Args:
+        image: Imagem PIL para análise
+
+    Returns:
+        IndexedColorMap: Índices, paleta e contagem de cada cor
+    """
+    packed = image_to_packed(image)
+    if packed.size >= _TABLE_MIN_PIXELS:
+        flat = packed.ravel()
+        counts = np.bincount(flat, minlength=1 << 24)
+        colors = np.flatnonzero(counts).astype(np.uint32)
+        counts = counts[colors]
+        lookup = np.zeros(1 << 24, dtype=_smallest_index_dtype(len(colors)))
+        lookup[colors] = np.arange(len(colors), dtype=lookup.dtype)
+        indices = lookup[flat]
+    else:
+        colors, inverse, counts = np.unique(packed.ravel(), return_inverse=True, return_counts=True)
+        indices = inverse.astype(_smallest_index_dtype(len(colors)))
+    return IndexedColorMap(indices.reshape(packed.shape), unpack_rgb(colors), counts)
+
+
+def count_colors(image: Image.Image) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Conta os pixels de cada cor da imagem (convertida para RGB).
+
+    Imagens com poucas cores (ex.: quantizadas) são contadas pelo
+    Image.getcolors; as demais, por np.unique sobre os valores 0xRRGGBB.
+
+    Args:
+        image: Imagem PIL para análise
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (cores empacotadas em ordem crescente, contagens)
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    found = image.getcolors(maxcolors=_GETCOLORS_MAX)
+    if found is not None:
+        counts = np.array([count for count, _ in found], dtype=np.int64)
+        colors = pack_rgb(np.array([color for _, color in found], dtype=np.uint8).reshape(-1, 3))
+        order = np.argsort(colors)
+        return colors[order], counts[order]
+    return np.unique(image_to_packed(image).ravel(), return_counts=True)
+
+
+def color_frequency(image: Image.Image, max_colors: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cores da imagem da mais para a menos frequente.
+
+    Empates ficam em ordem crescente de 0xRRGGBB.
+
+    Args:
+        image: Imagem PIL para análise
+        max_colors: Número máximo de cores a retornar (None: todas)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (cores empacotadas, porcentagem de pixels de cada uma)
+    """
+    colors, counts = count_colors(image)
+    order = np.argsort(-counts, kind="stable")
+    if max_colors is not None:
+        order = order[:max_colors]
+    return colors[order], counts[order] / max(1, image.width * image.height) * 100
+
+
+def frequency_to_hex(colors: np.ndarray, percentages: np.ndarray) -> List[Tuple[str, float]]:
+    """Converte o resultado de color_frequency na lista [('#rrggbb', porcentagem), ...]."""
+    return [(f"#{color:06x}", percentage) for color, percentage in zip(colors.tolist(), percentages.tolist())]
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Converte cores sRGB (..., 3) uint8 para CIELAB (iluminante D65)."""
+    linear = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(linear <= 0.04045, linear / 12.92, ((linear + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([[0.4124564, 0.3575761, 0.1804375],
+                             [0.2126729, 0.7151522, 0.0721750],
+                             [0.0193339, 0.1191920, 0.9503041]]).T
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    delta = 6 / 29
+    f = np.where(xyz > delta ** 3, np.cbrt(xyz), xyz / (3 * delta ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def cluster_colors(colors: np.ndarray, threshold: float, space: str = "rgb") -> np.ndarray:
+    """
+    Agrupa cores próximas, na ordem de prioridade recebida.
+
+    Cada cor ainda sem grupo, na ordem do array, inicia um grupo e absorve
+    todas as cores sem grupo a uma distância menor que threshold dela (a
+    mesma regra do agrupamento anterior, que comparava todas com todas). A
+    busca de vizinhos usa uma KD-tree, e cores sem nenhuma vizinha no raio
+    nem entram no laço.
+
+    Args:
+        colors: Cores (N, 3) uint8, da mais para a menos prioritária (ex.: mais frequente)
+        threshold: Distância máxima (exclusiva) até a cor inicial do grupo
+        space: "rgb" (distância euclidiana em RGB, 0-441) ou "lab" (ΔE76 em CIELAB)
+
+    Returns:
+        np.ndarray: Para cada cor, o índice da cor que iniciou o seu grupo
+    """
+    count = len(colors)
+    labels = np.arange(count)
+    if count < 2 or threshold <= 0:
+        return labels
+    if space == "lab":
+        points = rgb_to_lab(colors)
+    elif space == "rgb":
+        points = np.asarray(colors, dtype=np.float64)
+    else:
+        raise ValueError(f"Espaço de cor desconhecido: {space}")
+
+    tree = cKDTree(points)
+    radius = np.nextafter(threshold, 0)  # a KD-tree inclui a borda do raio; a regra antiga não
+    # Cores sem vizinhas no raio (a mais próxima além dela mesma está longe)
+    # ficam sozinhas no próprio grupo
+    distances, _ = tree.query(points, k=2, distance_upper_bound=radius)
+    assigned = np.isinf(distances[:, 1])
+    for seed in np.flatnonzero(~assigned):
+        if assigned[seed]:
+            continue
+        members = np.asarray(tree.query_ball_point(points[seed], radius), dtype=np.intp)
+        members = members[~assigned[members]]
+        labels[members] = seed
+        assigned[members] = True
+    return labels
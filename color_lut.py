@@ -0,0 +1,205 @@
+# file: color_lut.py
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Ajustes que podem ser compilados em uma única tabela de cores
+FUSABLE_FILTERS = frozenset({"brightness", "contrast", "saturation", "color_matrix"})
+
+# Pesos da conversão para "L" usados pelo PIL (e por ImageEnhance)
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+
+class ColorLUT:
+    """
+    Tabela de cores que aplica uma sequência de ajustes em uma única passada.
+
+    Pode ser 1D (uma curva de 256 entradas por canal, aplicada com
+    Image.point) ou 3D (grade N×N×N de cores de saída, interpolada pelo
+    ImageFilter.Color3DLUT), necessária quando os canais se misturam
+    (saturação, matrizes de cor). Lê e grava arquivos .cube.
+    """
+
+    def __init__(self, curves: Optional[np.ndarray] = None, table: Optional[np.ndarray] = None,
+                 title: str = ""):
+        """
+        Args:
+            curves: Curvas 1D, array (3, 256) com valores de 0 a 255
+            table: Tabela 3D, array (N, N, N, 3) indexado [b][g][r], valores de 0 a 255
+            title: Título gravado no arquivo .cube
+        """
+        if (curves is None) == (table is None):
+            raise ValueError("Informe curvas 1D ou uma tabela 3D")
+        self.curves = curves
+        self.table = table
+        self.title = title
+
+    @property
+    def is_3d(self) -> bool:
+        return self.table is not None
+
+    def apply(self, image: Image.Image) -> Image.Image:
+        """Aplica a tabela à imagem (o canal alfa é preservado)."""
+        if not self.is_3d:
+            lut = np.clip(np.rint(self.curves), 0, 255).astype(np.uint8)
+            if image.mode == "L" and (lut[0] == lut[1]).all() and (lut[1] == lut[2]).all():
+                return image.point(lut[0].tolist())
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            table = lut.ravel().tolist()
+            if image.mode == "RGBA":
+                table += list(range(256))
+            return image.point(table)
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        size = self.table.shape[0]
+        lut = ImageFilter.Color3DLUT(size, (self.table.reshape(-1, 3) / 255.0).ravel().tolist())
+        if image.mode == "RGBA":
+            alpha = image.getchannel("A")
+            result = image.convert("RGB").filter(lut)
+            result.putalpha(alpha)
+            return result
+        return image.filter(lut)
+
+    def save_cube(self, path: str):
+        """Grava a tabela no formato .cube (Adobe/Resolve)."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'TITLE "{self.title or os.path.splitext(os.path.basename(path))[0]}"\n')
+            if self.is_3d:
+                f.write(f"LUT_3D_SIZE {self.table.shape[0]}\n")
+                rows = self.table.reshape(-1, 3)
+            else:
+                f.write(f"LUT_1D_SIZE {self.curves.shape[1]}\n")
+                rows = self.curves.T
+            f.write("DOMAIN_MIN 0.0 0.0 0.0\nDOMAIN_MAX 1.0 1.0 1.0\n")
+            for r, g, b in np.clip(rows / 255.0, 0, 1):
+                f.write(f"{r:.6f} {g:.6f} {b:.6f}\n")
+
+    @classmethod
+    def load_cube(cls, path: str) -> "ColorLUT":
+        """
+        Lê um arquivo .cube 1D ou 3D.
+
+        Raises:
+            ValueError: Se o arquivo for inválido ou usar um domínio diferente de 0-1
+        """
+        title, size_1d, size_3d, rows = "", None, None, []
+        with open(path, "r", encoding="utf-8") as f:
+            for raw_line in f:
+                line = raw_line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                keyword = line.split()[0].upper()
+                if keyword == "TITLE":
+                    title = line[5:].strip().strip('"')
+                elif keyword == "LUT_1D_SIZE":
+                    size_1d = int(line.split()[1])
+                elif keyword == "LUT_3D_SIZE":
+                    size_3d = int(line.split()[1])
+                elif keyword in ("DOMAIN_MIN", "DOMAIN_MAX"):
+                    expected = 0.0 if keyword == "DOMAIN_MIN" else 1.0
+                    if any(float(v) != expected for v in line.split()[1:4]):
+                        raise ValueError(f"Domínio não suportado em {os.path.basename(path)}: {line}")
+                elif keyword[0].isdigit() or keyword[0] in "-.":
+                    rows.append([float(v) for v in line.split()[:3]])
+        data = np.array(rows, dtype=np.float64) * 255.0
+        if size_3d:
+            if len(data) != size_3d ** 3:
+                raise ValueError(f"Esperadas {size_3d ** 3} entradas, encontradas {len(data)}")
+            return cls(table=data.reshape(size_3d, size_3d, size_3d, 3), title=title)
+        if size_1d:
+            if len(data) != size_1d:
+                raise ValueError(f"Esperadas {size_1d} entradas, encontradas {len(data)}")
+            if size_1d != 256:
+                # Reamostra a curva para uma entrada por nível de 8 bits
+                positions = np.linspace(0, size_1d - 1, 256)
+                data = np.stack([np.interp(positions, np.arange(size_1d), data[:, c]) for c in range(3)], axis=1)
+            return cls(curves=data.T.copy(), title=title)
+        raise ValueError(f"Arquivo .cube sem LUT_1D_SIZE ou LUT_3D_SIZE: {os.path.basename(path)}")
+
+
+def _sample_pixels(image: Image.Image, max_side: int = 256) -> np.ndarray:
+    """Amostra reduzida dos pixels (N, 3) para estimar médias como a do contraste."""
+    sample = image
+    if max(sample.size) > max_side:
+        ratio = max_side / max(sample.size)
+        size = (max(1, round(sample.width * ratio)), max(1, round(sample.height * ratio)))
+        # reducing_gap usa Image.reduce antes da reamostragem (bem mais rápido)
+        sample = sample.resize(size, Image.Resampling.BOX, reducing_gap=2.0)
+    if sample.mode != "RGB":
+        sample = sample.convert("RGB")
+    return np.asarray(sample, dtype=np.float64).reshape(-1, 3)
+
+
+def _apply_stage(name: str, params: dict, values: np.ndarray, mean: float) -> np.ndarray:
+    """Aplica um ajuste a um array de cores (N, 3) com as mesmas fórmulas de ImageEnhance."""
+    if name == "brightness":
+        # Mistura com preto
+        values = values * params.get("value", 1.0)
+    elif name == "contrast":
+        # Mistura com o cinza médio da imagem
+        values = mean + params.get("value", 1.0) * (values - mean)
+    elif name == "saturation":
+        # Mistura com a versão em tons de cinza
+        luma = (values @ LUMA_WEIGHTS)[:, None]
+        values = luma + params.get("value", 1.0) * (values - luma)
+    elif name == "color_matrix":
+        matrix = np.array(params["matrix"], dtype=np.float64).reshape(3, 4)
+        values = values @ matrix[:, :3].T + matrix[:, 3]
+    else:
+        raise ValueError(f"Ajuste não compilável em LUT: {name}")
+    return np.clip(values, 0, 255)
+
+
+def compile_adjustments(stages: Iterable[Tuple[str, dict]], image: Optional[Image.Image] = None,
+                        grid_size: int = 33) -> ColorLUT:
+    """
+    Compila uma sequência de ajustes em uma única tabela de cores.
+
+    Brilho e contraste geram curvas 1D; saturação e matrizes de cor exigem
+    uma tabela 3D. O contraste depende do cinza médio da imagem na sua
+    entrada, estimado a partir de uma amostra reduzida da imagem que passa
+    pelas etapas anteriores.
+
+    Args:
+        stages: Sequência de (nome, parâmetros)
+        image: Imagem de entrada (necessária se houver contraste)
+        grid_size: Lado da grade da tabela 3D
+
+    Returns:
+        ColorLUT: Tabela equivalente à sequência
+    """
+    stages = [(name, dict(params)) for name, params in stages]
+    needs_3d = any(name in ("saturation", "color_matrix") for name, _ in stages)
+    if needs_3d:
+        axis = np.linspace(0, 255, grid_size)
+        b, g, r = np.meshgrid(axis, axis, axis, indexing="ij")
+        values = np.stack([r, g, b], axis=-1).reshape(-1, 3)  # vermelho varia mais rápido
+    else:
+        values = np.repeat(np.arange(256, dtype=np.float64)[:, None], 3, axis=1)
+
+    needs_mean = any(name == "contrast" for name, _ in stages)
+    if needs_mean and image is None:
+        raise ValueError("O contraste precisa da imagem para calcular o cinza médio")
+    sample = _sample_pixels(image) if needs_mean else None
+
+    for name, params in stages:
+        mean = 0.0
+        if name == "contrast":
+            # Mesmo arredondamento de ImageEnhance.Contrast
+            mean = float(int((sample @ LUMA_WEIGHTS).mean() + 0.5))
+        values = _apply_stage(name, params, values, mean)
+        if sample is not None:
+            sample = _apply_stage(name, params, sample, mean)
+
+    if needs_3d:
+        return ColorLUT(table=values.reshape(grid_size, grid_size, grid_size, 3))
+    return ColorLUT(curves=values.T.copy())
+
+
+def apply_adjustments(image: Image.Image, stages: Iterable[Tuple[str, dict]]) -> Image.Image:
+    """Aplica uma sequência de ajustes compiláveis em uma única passada."""
+    return compile_adjustments(stages, image).apply(image)
@@ -2,7 +2,7 @@
 import sqlite3
 
 DB_PATH = "image_editor.db"
-SCHEMA_VERSION = 11  # Updated from 10 to 11
+SCHEMA_VERSION = 12  # Updated from 11 to 12
 
 MIGRATIONS = [
     # version 1
@@ -188,6 +188,21 @@ MIGRATIONS = [
     
     -- Atualiza a versão do schema
     UPDATE preferences SET value = '11' WHERE key = 'schema_version';
+    ''',
+    # version 12
+    '''
+    -- Cache da análise de paleta, indexado pelo hash do conteúdo da imagem
+    CREATE TABLE IF NOT EXISTS palette_cache (
+        content_hash TEXT PRIMARY KEY,
+        color_freq TEXT NOT NULL,
+        color_clusters TEXT NOT NULL,
+        quantized BLOB NOT NULL,
+        criado_em TIMESTAMP DEFAULT (datetime('now', '-3 hours')),
+        ultimo_uso TIMESTAMP DEFAULT (datetime('now', '-3 hours'))
+    );
+
+    -- Atualiza a versão do schema
+    UPDATE preferences SET value = '12' WHERE key = 'schema_version';
     '''
 ]
 
@@ -0,0 +1,93 @@
+# file: display_surface.py
+from collections import OrderedDict
+from typing import Tuple
+
+from PIL import Image, ImageTk
+
+
+class DisplaySurface:
+    """
+    Superfície de exibição com um único item de imagem no canvas.
+
+    Mantém um PhotoImage por (modo, tamanho) e atualiza os pixels com
+    PhotoImage.paste em vez de criar um PhotoImage e um item novos a cada
+    quadro, evitando a troca constante de objetos Tk durante zoom e animação.
+    """
+
+    def __init__(self, canvas, max_buffers: int = 4, tags: Tuple[str, ...] = ("image",)):
+        """
+        Args:
+            canvas: Canvas Tk onde a imagem é exibida
+            max_buffers: Número máximo de PhotoImages de tamanhos diferentes mantidos
+            tags: Tags do item de imagem no canvas
+        """
+        self.canvas = canvas
+        self.max_buffers = max_buffers
+        self.tags = tags
+        self.item = None
+        self.photo = None
+        self._buffers = OrderedDict()  # (modo, tamanho) -> PhotoImage
+        self.pastes = 0
+        self.allocations = 0
+
+    def show(self, bitmap: Image.Image, position: Tuple[float, float], anchor: str = "center") -> int:
+        """
+        Exibe um bitmap, reaproveitando o item do canvas e o PhotoImage do mesmo tamanho.
+
+        Args:
+            bitmap: Imagem PIL já renderizada
+            position: Posição do item no canvas (x, y)
+            anchor: Âncora do item ("center", "nw", ...)
+
+        Returns:
+            int: ID do item de imagem no canvas
+        """
+        has_alpha = bitmap.mode in ("RGBA", "LA", "PA") or "transparency" in bitmap.info
+        mode = "RGBA" if has_alpha else "RGB"
+        if bitmap.mode != mode:
+            # convert() respeita a transparência de imagens com paleta
+            bitmap = bitmap.convert(mode)
+        photo = self._get_buffer(mode, bitmap.size)
+        photo.paste(bitmap)
+        self.pastes += 1
+
+        if self.item is None or not self.canvas.type(self.item):
+            self.item = self.canvas.create_image(*position, image=photo, anchor=anchor, tags=self.tags)
+        else:
+            self.canvas.coords(self.item, *position)
+            if photo is not self.photo:
+                self.canvas.itemconfig(self.item, image=photo)
+            self.canvas.itemconfig(self.item, anchor=anchor)
+            self.canvas.tag_raise(self.item)
+        self.photo = photo
+        return self.item
+
+    def _get_buffer(self, mode: str, size: Tuple[int, int]) -> ImageTk.PhotoImage:
+        key = (mode, size)
+        photo = self._buffers.get(key)
+        if photo is not None:
+            self._buffers.move_to_end(key)
+            return photo
+        photo = ImageTk.PhotoImage(mode, size)
+        self.allocations += 1
+        self._buffers[key] = photo
+        while len(self._buffers) > self.max_buffers:
+            oldest_key, oldest = next(iter(self._buffers.items()))
+            if oldest is self.photo:
+                # Nunca descarta o buffer que está na tela
+                self._buffers.move_to_end(oldest_key)
+                continue
+            del self._buffers[oldest_key]
+        return photo
+
+    def hide(self):
+        """Remove o item do canvas (os buffers são mantidos)."""
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item = None
+        self.photo = None
+
+    def clear(self):
+        """Remove o item e libera os buffers."""
+        self.hide()
+        self._buffers.clear()
@@ -0,0 +1,199 @@
+# file: filter_jobs.py
+import queue
+import threading
+from typing import Callable, Optional
+
+from PIL import Image
+
+
+class JobCancelled(Exception):
+    """Levantada dentro de um trabalho cujo resultado não interessa mais."""
+
+
+class CancellationToken:
+    """Sinal de cancelamento consultado pelo trabalho entre blocos ou etapas."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Interrompe o trabalho se ele foi cancelado."""
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+def apply_in_strips(image: Image.Image, func: Callable[[Image.Image], Image.Image],
+                    token: Optional[CancellationToken] = None, strip_height: int = 256) -> Image.Image:
+    """
+    Aplica um filtro pixel a pixel em faixas horizontais, verificando o cancelamento entre elas.
+
+    Só serve para filtros em que cada pixel de saída depende apenas do mesmo
+    pixel de entrada (brilho, saturação, negativo...); filtros de vizinhança
+    ou que usam estatísticas da imagem inteira devem ser aplicados de uma vez.
+
+    Args:
+        image: Imagem de entrada
+        func: Filtro aplicado a cada faixa
+        token: Token de cancelamento (opcional)
+        strip_height: Altura de cada faixa em pixels
+
+    Returns:
+        Image.Image: Imagem filtrada
+    """
+    if image.height <= strip_height:
+        if token is not None:
+            token.check()
+        return func(image)
+    result = None
+    for top in range(0, image.height, strip_height):
+        if token is not None:
+            token.check()
+        strip = func(image.crop((0, top, image.width, min(image.height, top + strip_height))))
+        if result is None:
+            result = Image.new(strip.mode, image.size)
+        result.paste(strip, (0, top))
+    return result
+
+
+class FilterJobService:
+    """
+    Execução de filtros em segundo plano com uma vaga pendente por destino.
+
+    Cada destino ("preview", "commit", ...) tem sua própria thread. Um novo
+    pedido substitui o que ainda estava na fila e cancela o que estiver em
+    execução no mesmo destino; o trabalho cancelado para na próxima
+    verificação do token e seu resultado nunca chega à interface.
+    """
+
+    def __init__(self, widget, poll_interval: int = 10):
+        """
+        Args:
+            widget: Widget Tk usado para entregar os resultados na thread principal
+            poll_interval: Intervalo em ms entre verificações de resultados prontos
+        """
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._pending = {}  # destino -> (token, trabalho, on_done, on_error)
+        self._running = {}  # destino -> token em execução
+        self._threads = {}
+        self._results = queue.Queue()
+        self._polling = False
+
+        # Estatísticas
+        self.submitted = 0
+        self.superseded = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    def submit(self, target: str, job: Callable[[CancellationToken], object],
+               on_done: Callable[[object], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> CancellationToken:
+        """
+        Agenda um trabalho, substituindo o pedido anterior do mesmo destino.
+
+        Args:
+            target: Destino do trabalho; cada destino tem uma vaga pendente
+            job: Função executada em segundo plano; recebe o token de cancelamento
+            on_done: Chamada na thread principal com o resultado
+            on_error: Chamada na thread principal se o trabalho falhar
+
+        Returns:
+            CancellationToken: Token do novo trabalho
+        """
+        token = CancellationToken()
+        with self._condition:
+            self._cancel_locked(target)
+            self._pending[target] = (token, job, on_done, on_error)
+            self.submitted += 1
+            if target not in self._threads:
+                thread = threading.Thread(target=self._run, args=(target,), daemon=True)
+                self._threads[target] = thread
+                thread.start()
+            self._condition.notify_all()
+        self._ensure_polling()
+        return token
+
+    def cancel(self, target: Optional[str] = None):
+        """Cancela o pedido pendente e o trabalho em execução (sem destino, de todos)."""
+        with self._condition:
+            targets = [target] if target is not None else list(set(self._pending) | set(self._running))
+            for name in targets:
+                self._cancel_locked(name)
+
+    def _cancel_locked(self, target):
+        pending = self._pending.pop(target, None)
+        if pending is not None:
+            pending[0].cancel()
+            self.superseded += 1
+        running = self._running.get(target)
+        if running is not None and not running.cancelled:
+            running.cancel()
+            self.cancelled += 1
+
+    def is_busy(self, target: Optional[str] = None) -> bool:
+        with self._condition:
+            if target is None:
+                return bool(self._pending) or bool(self._running)
+            return target in self._pending or target in self._running
+
+    def _run(self, target):
+        while True:
+            with self._condition:
+                while target not in self._pending:
+                    self._condition.wait()
+                token, job, on_done, on_error = self._pending.pop(target)
+                self._running[target] = token
+            try:
+                result, error = job(token), None
+            except JobCancelled:
+                result, error = None, None
+            except Exception as e:
+                result, error = None, e
+            with self._condition:
+                self._running.pop(target, None)
+            self._results.put((token, result, error, on_done, on_error))
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Entrega na thread principal os resultados de trabalhos não cancelados."""
+        while True:
+            try:
+                token, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if token.cancelled:
+                continue
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"Erro no filtro em segundo plano: {error}")
+            else:
+                self.completed += 1
+                on_done(result)
+
+        if self.is_busy() or not self._results.empty():
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do serviço."""
+        return {
+            "submitted": self.submitted,
+            "superseded": self.superseded,
+            "cancelled": self.cancelled,
+            "completed": self.completed,
+        }
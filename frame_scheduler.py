@@ -0,0 +1,107 @@
+# file: frame_scheduler.py
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class FrameScheduler:
+    """
+    Agendador central de redesenhos para o loop principal do Tk.
+
+    Cada parte da interface que precisa ser atualizada é marcada como "suja"
+    com invalidate(); todas as marcações feitas dentro de um intervalo de
+    quadro são atendidas por uma única execução de cada callback registrado.
+    """
+
+    def __init__(self, widget, frame_interval: int = 16, frame_budget: float = 12.0):
+        """
+        Args:
+            widget: Widget Tk usado para agendar com after()
+            frame_interval: Intervalo entre quadros em ms
+            frame_budget: Tempo máximo por quadro em ms; o que passar disso
+                fica para o quadro seguinte
+        """
+        self.widget = widget
+        self.frame_interval = frame_interval
+        self.frame_budget = frame_budget
+        self._handlers = OrderedDict()
+        self._dirty = set()
+        self._job = None
+
+        # Estatísticas
+        self.requests = 0       # Total de invalidações recebidas
+        self.merged = 0         # Invalidações absorvidas por uma já pendente
+        self.dropped = 0        # Invalidações canceladas antes de serem atendidas
+        self.deferred = 0       # Callbacks adiados por estouro do orçamento
+        self.frames = 0         # Quadros executados
+        self.over_budget = 0    # Quadros que estouraram o orçamento
+        self.last_frame_ms = 0.0
+
+    def register(self, flag: str, callback: Callable[[], None]):
+        """Associa um callback a uma marcação; a ordem de registro é a ordem de execução."""
+        self._handlers[flag] = callback
+
+    def invalidate(self, *flags: str):
+        """Marca partes da interface como sujas e agenda um quadro, se necessário."""
+        for flag in flags:
+            self.requests += 1
+            if flag in self._dirty:
+                self.merged += 1
+            else:
+                self._dirty.add(flag)
+        if self._dirty and self._job is None:
+            self._job = self.widget.after(self.frame_interval, self._run_frame)
+
+    def cancel(self, *flags: str):
+        """Descarta marcações pendentes (sem flags, descarta todas)."""
+        to_drop = set(flags) if flags else set(self._dirty)
+        for flag in to_drop & self._dirty:
+            self._dirty.discard(flag)
+            self.dropped += 1
+        if not self._dirty and self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def flush(self):
+        """Executa imediatamente o quadro pendente."""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._run_frame()
+
+    def _run_frame(self):
+        self._job = None
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        start = time.perf_counter()
+        for flag, callback in self._handlers.items():
+            if flag not in dirty:
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed > self.frame_budget:
+                # Sem tempo neste quadro: o restante fica para o próximo
+                self._dirty.add(flag)
+                self.deferred += 1
+                continue
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro ao atualizar '{flag}': {e}")
+        self.last_frame_ms = (time.perf_counter() - start) * 1000
+        self.frames += 1
+        if self.last_frame_ms > self.frame_budget:
+            self.over_budget += 1
+        if self._dirty and self._job is None:
+            self._job = self.widget.after(self.frame_interval, self._run_frame)
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do agendador."""
+        return {
+            "requests": self.requests,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "deferred": self.deferred,
+            "frames": self.frames,
+            "over_budget": self.over_budget,
+            "last_frame_ms": self.last_frame_ms,
+        }
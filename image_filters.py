@@ -1,7 +1,11 @@
+from functools import partial
+
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps, ImageChops
 import numpy as np
 from scipy import ndimage
 
+from tiled_executor import run_tiled
+
 # Tenta importar cv2 para operações avançadas
 try:
     import cv2
@@ -31,37 +35,88 @@ def adjust_sharpness(image, factor):
     enhancer = ImageEnhance.Sharpness(image)
     return enhancer.enhance(factor)
 
-# Filtros artísticos
-def apply_grayscale(image):
-    """Convert the image to grayscale."""
-    return image.convert("L")
+# Matrizes de cor
+# Cada matriz tem 12 coeficientes, 3 linhas (R, G, B) de 4: r, g, b e deslocamento
+SEPIA_MATRIX = (
+    0.393, 0.769, 0.189, 0,
+    0.349, 0.686, 0.168, 0,
+    0.272, 0.534, 0.131, 0,
+)
 
-def apply_sepia(image):
-    """Apply a sepia filter to the image."""
-    sepia_image = image.convert("RGB")
-    width, height = sepia_image.size
-    pixels = sepia_image.load()  # create the pixel map
+IDENTITY_MATRIX = (
+    1, 0, 0, 0,
+    0, 1, 0, 0,
+    0, 0, 1, 0,
+)
+
+LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+def apply_color_matrix(image, matrix):
+    """Apply a 3x4 colour matrix to the image in a single pass.
+
+    Each output channel is ``m[0]*R + m[1]*G + m[2]*B + m[3]`` for its row of
+    the matrix, clipped to 0-255. Alpha is preserved.
+
+    Args:
+        image: PIL Image object
+        matrix: 12 coefficients (rows R, G, B of r, g, b, offset)
+
+    Returns:
+        RGB (or RGBA) PIL Image
+    """
+    if len(matrix) != 12:
+        raise ValueError("A color matrix needs 12 coefficients (3 rows of 4)")
+    alpha = None
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        alpha = image.getchannel("A")
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    # Image.convert aplica a matriz em C, sem passar pixel a pixel pelo Python
+    result = image.convert("RGB", tuple(float(c) for c in matrix))
+    if alpha is not None:
+        result.putalpha(alpha)
+    return result
 
-    for py in range(height):
-        for px in range(width):
-            r, g, b = sepia_image.getpixel((px, py))
+def multiply_color_matrices(first, second):
+    """Combine two colour matrices into one that applies ``first`` then ``second``."""
+    a = np.vstack([np.array(first, dtype=np.float64).reshape(3, 4), [0, 0, 0, 1]])
+    b = np.vstack([np.array(second, dtype=np.float64).reshape(3, 4), [0, 0, 0, 1]])
+    return tuple((b @ a)[:3].ravel())
 
-            tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-            tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-            tb = int(0.272 * r + 0.534 * g + 0.131 * b)
+def channel_mixer_matrix(red=(1, 0, 0), green=(0, 1, 0), blue=(0, 0, 1), offset=(0, 0, 0)):
+    """Build a channel-mixer matrix from the source weights of each output channel."""
+    return tuple(red) + (offset[0],) + tuple(green) + (offset[1],) + tuple(blue) + (offset[2],)
 
-            if tr > 255:
-                tr = 255
+def tint_matrix(color, strength=0.5):
+    """Build a matrix that blends the image with its luminance tinted by ``color``.
 
-            if tg > 255:
-                tg = 255
+    Args:
+        color: (r, g, b) tint colour
+        strength: 0.0 keeps the image, 1.0 is a pure monochrome tint
+    """
+    matrix = []
+    for channel, tint in enumerate(color):
+        row = [(1 - strength) * (1 if i == channel else 0) + strength * tint / 255 * LUMA_WEIGHTS[i]
+               for i in range(3)]
+        matrix.extend(row + [0])
+    return tuple(matrix)
 
-            if tb > 255:
-                tb = 255
+def duotone_matrix(shadow, highlight):
+    """Build a matrix mapping luminance from the ``shadow`` colour to the ``highlight`` colour."""
+    matrix = []
+    for low, high in zip(shadow, highlight):
+        matrix.extend([(high - low) / 255 * w for w in LUMA_WEIGHTS] + [low])
+    return tuple(matrix)
 
-            pixels[px, py] = (tr, tg, tb)
+# Filtros artísticos
+def apply_grayscale(image):
+    """Convert the image to grayscale."""
+    return image.convert("L")
 
-    return sepia_image
+def apply_sepia(image):
+    """Apply a sepia filter to the image."""
+    return apply_color_matrix(image, SEPIA_MATRIX)
 
 def apply_negative(image):
     """Apply a negative filter to the image."""
@@ -79,23 +134,25 @@ def apply_vintage(image):
     return image.filter(ImageFilter.GaussianBlur(2))
 
 # Filtros de suavização e realce
-def apply_smooth(image, intensity=1.0):
-    """Apply a smoothing filter to the image with adjustable intensity.
-    
-    Args:
-        image: PIL Image object
-        intensity: Float between 0.0 and 3.0 controlling the smoothing strength
-    
-    Returns:
-        Smoothed PIL Image
-    """
-    # Limita a intensidade entre 0.1 e 3.0
-    intensity = max(0.1, min(3.0, intensity))
-    
-    # Converte para modo RGB se necessário
-    if image.mode != "RGB":
-        image = image.convert("RGB")
-    
+def _smooth_halo(intensity):
+    """Raio (em pixels) até onde a suavização enxerga vizinhos."""
+    if CV2_AVAILABLE:
+        kernel_size = int(intensity * 5)
+        if kernel_size % 2 == 0:
+            kernel_size += 1
+        # O bilateralFilter usa raio de pelo menos 1 pixel, mesmo com kernel 1
+        return max(1, kernel_size // 2)
+    # O GaussianBlur do PIL usa três passadas de box blur, com alcance de ~3 raios
+    halo = int(3 * intensity) + 3
+    if intensity > 1.5:
+        median_size = int(intensity * 2)
+        if median_size % 2 == 0:
+            median_size += 1
+        halo += median_size // 2
+    return halo
+
+def _smooth_tile(image, intensity):
+    """Smooth one RGB tile (or the whole image)."""
     # Aplica filtro de suavização com intensidade ajustável
     if CV2_AVAILABLE:
         # Usa OpenCV para suavização mais avançada
@@ -121,6 +178,46 @@ def apply_smooth(image, intensity=1.0):
             blurred = blurred.filter(ImageFilter.MedianFilter(size=median_size))
         return blurred
 
+def apply_smooth(image, intensity=1.0):
+    """Apply a smoothing filter to the image with adjustable intensity.
+    
+    Large images are processed in overlapping tiles on all cores; the result
+    matches filtering the whole image at once (exactly with PIL; with OpenCV,
+    up to 1 level of rounding in its vectorized code at the end of each row).
+    
+    Args:
+        image: PIL Image object
+        intensity: Float between 0.0 and 3.0 controlling the smoothing strength
+    
+    Returns:
+        Smoothed PIL Image
+    """
+    # Limita a intensidade entre 0.1 e 3.0
+    intensity = max(0.1, min(3.0, intensity))
+    
+    # Converte para modo RGB se necessário
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    
+    return run_tiled(image, partial(_smooth_tile, intensity=intensity), _smooth_halo(intensity))
+
+def _sharpen_tile(image, kernel):
+    """Apply the enhancement sharpening kernel to one RGB tile."""
+    return Image.fromarray(cv2.filter2D(np.array(image), -1, kernel))
+
+def _edge_enhance_tile(image, intensity):
+    """Sharpness and edge enhancement of the PIL fallback for one tile."""
+    # Aumenta nitidez
+    enhanced = ImageEnhance.Sharpness(image).enhance(1.0 + intensity)
+    
+    # Aplica um filtro de realce de bordas
+    if intensity > 0.5:
+        edge_enhanced = enhanced.filter(ImageFilter.EDGE_ENHANCE)
+        # Mistura a imagem original com a realçada
+        blend_factor = min(intensity / 2.0, 0.7)  # Limita o fator de mistura
+        enhanced = Image.blend(enhanced, edge_enhanced, blend_factor)
+    return enhanced
+
 def apply_enhance(image, intensity=1.0):
     """Apply an enhancement filter to the image with adjustable intensity.
     This filter enhances the overall vividness of colors and details in the image,
@@ -128,6 +225,9 @@ def apply_enhance(image, intensity=1.0):
     color intensity directly, this filter combines contrast, sharpness and edge
     enhancement for a more vibrant look.
     
+    The global stage (CLAHE or contrast, which depend on the whole image) runs
+    once; the local 3x3 stages run in overlapping tiles on all cores.
+    
     Args:
         image: PIL Image object
         intensity: Float between 0.0 and 2.0 controlling the enhancement strength
@@ -159,28 +259,17 @@ def apply_enhance(image, intensity=1.0):
         enhanced_lab = cv2.merge((cl, a, b))
         
         # Converte de volta para RGB
-        enhanced_array = cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2RGB)
+        enhanced = Image.fromarray(cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2RGB))
         
-        # Aplica um pouco de nitidez
+        # Aplica um pouco de nitidez (kernel 3x3: margem de 1 pixel por bloco)
         kernel = np.array([[-1, -1, -1],
                           [-1, 9 + intensity, -1],
                           [-1, -1, -1]])
-        enhanced_array = cv2.filter2D(enhanced_array, -1, kernel * intensity)
-        
-        return Image.fromarray(enhanced_array)
+        return run_tiled(enhanced, partial(_sharpen_tile, kernel=kernel * intensity), 1)
     else:
         # Usa filtros nativos do PIL
-        # Aumenta contraste
+        # Aumenta contraste (usa a média da imagem inteira, então não é feito em blocos)
         enhanced = ImageEnhance.Contrast(image).enhance(1.0 + (intensity * 0.3))
         
-        # Aumenta nitidez
-        enhanced = ImageEnhance.Sharpness(enhanced).enhance(1.0 + intensity)
-        
-        # Aplica um filtro de realce de bordas
-        if intensity > 0.5:
-            edge_enhanced = enhanced.filter(ImageFilter.EDGE_ENHANCE)
-            # Mistura a imagem original com a realçada
-            blend_factor = min(intensity / 2.0, 0.7)  # Limita o fator de mistura
-            enhanced = Image.blend(enhanced, edge_enhanced, blend_factor)
-        
-        return enhanced
\ No newline at end of file
+        # Nitidez e realce de bordas: dois kernels 3x3 encadeados, margem de 2 pixels
+        return run_tiled(enhanced, partial(_edge_enhance_tile, intensity=intensity), 2)
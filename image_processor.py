@@ -1,9 +1,14 @@
 # file: image_processor.py
 from PIL import Image, ImageTk
 import numpy as np
-from typing import Optional, Tuple, Union
+from typing import Callable, Optional, Tuple, Union
 import io
 
+from color_analysis import (
+    HexColorSet, IndexedColorMap, cluster_colors, color_frequency, frequency_to_hex, index_colors, parse_hex,
+    unpack_rgb
+)
+
 class ImageProcessor:
     @staticmethod
     def resize_image(image: Image.Image, width: int, height: int, keep_aspect: bool = True) -> Image.Image:
@@ -31,10 +36,10 @@ class ImageProcessor:
         return ImageTk.PhotoImage(image)
 
     @staticmethod
-    def calculate_new_dimensions(image: Image.Image, canvas_width: int, canvas_height: int, 
+    def calculate_new_dimensions(image: Union[Image.Image, Tuple[int, int]], canvas_width: int, canvas_height: int, 
                                fit_mode: str = "fit") -> Tuple[int, int]:
-        """Calcula as novas dimensões baseadas no modo de ajuste."""
-        img_width, img_height = image.size
+        """Calcula as novas dimensões baseadas no modo de ajuste (aceita a imagem ou seu tamanho)."""
+        img_width, img_height = image.size if isinstance(image, Image.Image) else image
         aspect_ratio = img_width / img_height
 
         if fit_mode == "width":
@@ -64,6 +69,178 @@ class ImageProcessor:
         new_height = int(image.height * zoom_level)
         return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
+    @staticmethod
+    def calculate_display_size(image_size: Tuple[int, int], canvas_width: int, canvas_height: int,
+                               fit_mode: str, zoom_level: float,
+                               integer_scale: bool = False) -> Tuple[int, int]:
+        """
+        Calcula o tamanho final da imagem na tela (ajuste + zoom) sem redimensioná-la.
+
+        Reproduz o resultado de resize_image (que nunca amplia) seguido de apply_zoom.
+
+        Args:
+            image_size: Dimensões originais da imagem (width, height)
+            canvas_width: Largura do canvas
+            canvas_height: Altura do canvas
+            fit_mode: Modo de ajuste ("fit", "width" ou "height")
+            zoom_level: Nível de zoom atual
+            integer_scale: Ajusta a escala para um fator inteiro (modo pixel art)
+
+        Returns:
+            Tuple[int, int]: Dimensões exibidas (width, height)
+        """
+        img_width, img_height = image_size
+        fit_width, fit_height = ImageProcessor.calculate_new_dimensions(
+            image_size, canvas_width, canvas_height, fit_mode
+        )
+        base_scale = min(1.0, fit_width / img_width, fit_height / img_height)
+        if integer_scale:
+            scale = ImageProcessor.snap_integer_scale(base_scale * zoom_level)
+            if scale < 1.0:
+                # Com 1/k, cada pixel exibido corresponde a k pixels inteiros de origem:
+                # arredondar para cima faria a última coluna/linha amostrar fora da imagem
+                step = round(1.0 / scale)
+                return max(1, img_width // step), max(1, img_height // step)
+            return max(1, round(img_width * scale)), max(1, round(img_height * scale))
+        base_width = max(1, round(img_width * base_scale))
+        base_height = max(1, round(img_height * base_scale))
+        if zoom_level == 1.0:
+            return base_width, base_height
+        return max(1, int(base_width * zoom_level)), max(1, int(base_height * zoom_level))
+
+    @staticmethod
+    def snap_integer_scale(scale: float) -> float:
+        """
+        Ajusta uma escala para o fator inteiro mais próximo (k ou 1/k).
+
+        Args:
+            scale: Escala de exibição desejada
+
+        Returns:
+            float: Escala inteira (2, 3, ...) ou fração unitária (1/2, 1/3, ...)
+        """
+        if scale >= 1.0:
+            return float(max(1, round(scale)))
+        return 1.0 / max(1, round(1.0 / scale))
+
+    @staticmethod
+    def step_integer_scale(scale: float, direction: int) -> float:
+        """
+        Avança ou recua um passo na sequência ... 1/3, 1/2, 1, 2, 3 ...
+
+        Args:
+            scale: Escala atual
+            direction: 1 para ampliar, -1 para reduzir
+
+        Returns:
+            float: Nova escala inteira
+        """
+        scale = ImageProcessor.snap_integer_scale(scale)
+        if scale >= 1.0:
+            factor = round(scale) + direction
+            return float(factor) if factor >= 1 else 0.5
+        divisor = round(1.0 / scale) - direction
+        return 1.0 / divisor if divisor >= 2 else 1.0
+
+    @staticmethod
+    def render_region_integer(image: Image.Image, scale: float,
+                              region: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        Renderiza uma região visível com escala inteira, replicando pixels (vizinho mais próximo).
+
+        Com escala inteira k, recorta só os pixels de origem visíveis e os
+        replica k vezes; o resultado é nítido e o custo depende apenas da
+        área visível.
+
+        Args:
+            image: Imagem PIL em resolução original
+            scale: Escala inteira (k) ou fração unitária (1/k)
+            region: Caixa visível (x1, y1, x2, y2) em coordenadas da imagem exibida
+
+        Returns:
+            Image.Image: Região renderizada com tamanho (x2 - x1, y2 - y1)
+        """
+        x1, y1, x2, y2 = region
+        if scale < 1.0:
+            step = round(1.0 / scale)
+            # Limita o recorte à imagem (imagens menores que k pixels): crop()
+            # preencheria o excesso com preto
+            source = image.crop((x1 * step, y1 * step, min(image.width, x2 * step), min(image.height, y2 * step)))
+            return source.resize((x2 - x1, y2 - y1), Image.Resampling.NEAREST)
+
+        factor = round(scale)
+        sx1, sy1 = x1 // factor, y1 // factor
+        sx2, sy2 = -(-x2 // factor), -(-y2 // factor)
+        source = image.crop((sx1, sy1, sx2, sy2))
+        # Redimensionar NEAREST por um fator inteiro é exatamente a replicação de pixels
+        enlarged = source.resize(((sx2 - sx1) * factor, (sy2 - sy1) * factor), Image.Resampling.NEAREST)
+        offset_x, offset_y = x1 - sx1 * factor, y1 - sy1 * factor
+        return enlarged.crop((offset_x, offset_y, offset_x + x2 - x1, offset_y + y2 - y1))
+
+    @staticmethod
+    def calculate_visible_region(display_size: Tuple[int, int], canvas_size: Tuple[int, int],
+                                 image_center: Tuple[float, float]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Calcula a parte da imagem exibida que está dentro do canvas.
+
+        Args:
+            display_size: Dimensões da imagem exibida (width, height)
+            canvas_size: Dimensões do canvas (width, height)
+            image_center: Posição do centro da imagem no canvas (x, y)
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: Caixa (x1, y1, x2, y2) em coordenadas
+            da imagem exibida, ou None se nada estiver visível
+        """
+        display_width, display_height = display_size
+        canvas_width, canvas_height = canvas_size
+        left = image_center[0] - display_width / 2
+        top = image_center[1] - display_height / 2
+
+        x1 = max(0, int(-left))
+        y1 = max(0, int(-top))
+        x2 = min(display_width, int(canvas_width - left + 1))
+        y2 = min(display_height, int(canvas_height - top + 1))
+
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+
+    @staticmethod
+    def render_region(image: Image.Image, display_size: Tuple[int, int],
+                      region: Tuple[int, int, int, int],
+                      resample: int = Image.Resampling.LANCZOS) -> Image.Image:
+        """
+        Renderiza apenas uma região da imagem exibida, recortando a origem antes de reamostrar.
+
+        Args:
+            image: Imagem PIL em resolução original
+            display_size: Dimensões da imagem exibida (width, height)
+            region: Caixa visível (x1, y1, x2, y2) em coordenadas da imagem exibida
+            resample: Filtro de reamostragem
+
+        Returns:
+            Image.Image: Região renderizada com tamanho (x2 - x1, y2 - y1)
+        """
+        x1, y1, x2, y2 = region
+        scale_x = image.width / display_size[0]
+        scale_y = image.height / display_size[1]
+        source_box = (x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
+        return image.resize((x2 - x1, y2 - y1), resample, box=source_box)
+
+    @staticmethod
+    def get_preview_resample(scale: float) -> int:
+        """
+        Escolhe um filtro rápido para a pré-visualização durante interações.
+
+        Args:
+            scale: Escala de exibição em relação à imagem de origem
+
+        Returns:
+            int: NEAREST para ampliações, BOX para reduções
+        """
+        return Image.Resampling.NEAREST if scale >= 1.0 else Image.Resampling.BOX
+
     @staticmethod
     def get_image_info(image: Image.Image) -> dict:
         """Retorna informações sobre a imagem."""
@@ -182,41 +359,21 @@ class ImageProcessor:
         )
 
     @staticmethod
-    def analyze_image_colors(image: Image.Image) -> tuple[dict, set]:
+    def analyze_image_colors(image: Image.Image) -> Tuple[IndexedColorMap, HexColorSet]:
         """
-        Analisa as cores de uma imagem pixel a pixel.
+        Analisa as cores de uma imagem (vetorizado, sem percorrer os pixels em Python).
         
         Args:
             image: Imagem PIL para análise
             
         Returns:
-            tuple[dict, set]: (mapa de posições e cores, conjunto único de cores)
+            tuple[IndexedColorMap, HexColorSet]: (mapa de posições e cores, conjunto único de cores).
+            O mapa guarda um índice por pixel e a paleta, mas continua aceitando
+            color_map[(x, y)] -> '#rrggbb'; o conjunto aceita 'in' e iteração
+            com strings hexadecimais, como antes.
         """
-        # Converte a imagem para RGB se não estiver
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-            
-        # Obtém os pixels da imagem
-        width, height = image.size
-        pixels = image.load()
-        
-        # Mapa de posições e cores
-        color_map = {}
-        # Conjunto de cores únicas
-        unique_colors = set()
-        
-        # Analisa cada pixel
-        for x in range(width):
-            for y in range(height):
-                color = pixels[x, y]
-                # Armazena a cor no formato hexadecimal
-                hex_color = '#{:02x}{:02x}{:02x}'.format(*color)
-                # Adiciona ao mapa de cores
-                color_map[(x, y)] = hex_color
-                # Adiciona ao conjunto de cores únicas
-                unique_colors.add(hex_color)
-                
-        return color_map, unique_colors
+        color_map = index_colors(image)
+        return color_map, color_map.unique_colors()
 
     @staticmethod
     def sort_colors_by_hue(colors: set) -> list:
@@ -285,78 +442,49 @@ class ImageProcessor:
         """
         Obtém a frequência de cada cor na imagem.
         
+        A contagem é feita sobre os valores RGB empacotados (Image.getcolors
+        ou np.unique); só as max_colors cores retornadas viram strings.
+        
         Args:
             image: Imagem PIL para análise
             max_colors: Número máximo de cores a retornar
             
         Returns:
-            list: Lista de tuplas (cor_hex, frequência)
+            list: Lista de tuplas (cor_hex, frequência), da mais para a menos frequente
         """
-        # Converte para RGB se necessário
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-            
-        # Obtém os pixels
-        pixels = list(image.getdata())
-        
-        # Conta a frequência de cada cor
-        color_counts = {}
-        total_pixels = len(pixels)
-        
-        for pixel in pixels:
-            hex_color = '#{:02x}{:02x}{:02x}'.format(*pixel)
-            color_counts[hex_color] = color_counts.get(hex_color, 0) + 1
-        
-        # Ordena por frequência e converte para porcentagem
-        sorted_colors = sorted(
-            [(color, count/total_pixels*100) for color, count in color_counts.items()],
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        return sorted_colors[:max_colors]
+        return frequency_to_hex(*color_frequency(image, max_colors))
 
     @staticmethod
-    def cluster_colors(colors: list, threshold: float = 1.0) -> list:
+    def cluster_colors(colors: list, threshold: float = 1.0, space: str = "rgb") -> list:
         """
-        Agrupa cores similares usando distância euclidiana no espaço RGB.
+        Agrupa cores similares (distância euclidiana em RGB ou ΔE em CIELAB).
+        
+        Cada cor, na ordem recebida, inicia um grupo com as cores ainda livres
+        a menos de threshold dela; a busca de vizinhos usa uma KD-tree, então
+        também serve para o conjunto completo de cores únicas de uma foto.
         
         Args:
             colors: Lista de tuplas (cor_hex, frequência)
-            threshold: Limiar de similaridade (0-255)
+            threshold: Limiar de similaridade (0-255 em RGB, ΔE em CIELAB)
+            space: "rgb" ou "lab"
             
         Returns:
             list: Lista de grupos de cores
         """
-        def hex_to_rgb(hex_color):
-            hex_color = hex_color.lstrip('#')
-            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-            
-        def color_distance(c1, c2):
-            r1, g1, b1 = hex_to_rgb(c1)
-            r2, g2, b2 = hex_to_rgb(c2)
-            return ((r1-r2)**2 + (g1-g2)**2 + (b1-b2)**2) ** 0.5
+        if not colors:
+            return []
+        packed = np.fromiter((parse_hex(color) for color, _ in colors), dtype=np.uint32, count=len(colors))
+        labels = cluster_colors(unpack_rgb(packed), threshold, space)
         
-        clusters = []
-        processed = set()
-        
-        for color, freq in colors:
-            if color in processed:
-                continue
-                
-            # Inicia novo cluster
-            cluster = [(color, freq)]
-            processed.add(color)
-            
-            # Procura cores similares
-            for other_color, other_freq in colors:
-                if other_color not in processed and color_distance(color, other_color) < threshold:
-                    cluster.append((other_color, other_freq))
-                    processed.add(other_color)
-            
-            # Adiciona cluster ordenado por frequência
+        # Grupos na ordem de criação; membros na ordem recebida (a cor inicial
+        # vem antes das que ela absorveu)
+        groups = {}
+        for color, label in zip(colors, labels.tolist()):
+            groups.setdefault(label, []).append(color)
+        clusters = list(groups.values())
+        for cluster in clusters:
+            # Ordena cada cluster por frequência
             cluster.sort(key=lambda x: x[1], reverse=True)
-            clusters.append(cluster)
         
         # Ordena clusters por frequência total
         clusters.sort(key=lambda x: sum(freq for _, freq in x), reverse=True)
@@ -364,23 +492,35 @@ class ImageProcessor:
         return clusters
 
     @staticmethod
-    def analyze_image_colors_advanced(image: Image.Image) -> tuple[list, list, Image.Image]:
+    def analyze_image_colors_advanced(image: Image.Image, progress: Optional[Callable[[str, float], None]] = None,
+                                      token=None) -> tuple[list, list, Image.Image]:
         """
         Realiza análise avançada das cores da imagem.
         
         Args:
             image: Imagem PIL para análise
+            progress: Chamada com (mensagem, fração concluída) antes de cada etapa (opcional)
+            token: Token de cancelamento verificado entre as etapas (opcional)
             
         Returns:
             tuple: (cores_frequentes, grupos_de_cores, imagem_quantizada)
         """
+        def step(message, fraction):
+            if token is not None:
+                token.check()
+            if progress is not None:
+                progress(message, fraction)
+        
         # Quantiza a imagem
+        step("Quantizando cores", 0.0)
         quantized = ImageProcessor.quantize_colors(image)
         
         # Obtém frequência das cores
+        step("Contando cores", 0.6)
         color_freq = ImageProcessor.get_color_frequency(quantized)
         
         # Agrupa cores similares
+        step("Agrupando cores", 0.8)
         color_clusters = ImageProcessor.cluster_colors(color_freq)
         
-        return color_freq, color_clusters, quantized 
\ No newline at end of file
+        return color_freq, color_clusters, quantized 
@@ -0,0 +1,92 @@
+# file: image_pyramid.py
+import threading
+from typing import Callable, List, Optional
+
+from PIL import Image
+
+
+class ImagePyramid:
+    """
+    Pirâmide de resoluções (1/2, 1/4, 1/8 ...) de uma imagem.
+
+    O nível 0 é a própria imagem; os demais são construídos em segundo plano
+    com Image.reduce e ficam disponíveis à medida que terminam. A exibição
+    reamostra a partir do menor nível que ainda tenha resolução suficiente.
+    """
+
+    def __init__(self, image: Image.Image, min_size: int = 256):
+        """
+        Args:
+            image: Imagem em resolução original (nível 0)
+            min_size: Menor dimensão abaixo da qual não se criam mais níveis
+        """
+        self.image = image
+        self.min_size = min_size
+        self.levels: List[Image.Image] = [image]
+        self._thread = None
+        self._cancelled = threading.Event()
+
+    @property
+    def is_building(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def build_async(self, on_ready: Optional[Callable[["ImagePyramid"], None]] = None):
+        """Constrói os níveis reduzidos em uma thread de fundo."""
+        if self._thread is not None:
+            return
+
+        def task():
+            try:
+                level = self.image
+                if level.mode in ("P", "1"):
+                    # Image.reduce não trabalha com paletas
+                    level = level.convert("RGBA" if "transparency" in level.info else "RGB")
+                while min(level.size) // 2 >= self.min_size:
+                    if self._cancelled.is_set():
+                        return
+                    level = level.reduce(2)
+                    self.levels.append(level)
+            except Exception as e:
+                print(f"Erro ao construir pirâmide de imagem: {e}")
+                return
+            if on_ready and not self._cancelled.is_set():
+                on_ready(self)
+
+        self._thread = threading.Thread(target=task, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Interrompe a construção (a pirâmide foi invalidada)."""
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda o fim da construção em segundo plano.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos (None: sem limite)
+
+        Returns:
+            bool: True se a construção terminou (ou nem foi iniciada)
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.is_building
+
+    def get_level(self, scale: float) -> Image.Image:
+        """
+        Retorna o menor nível já construído cuja resolução cobre a escala pedida.
+
+        Args:
+            scale: Escala de exibição em relação à imagem original
+
+        Returns:
+            Image.Image: Nível da pirâmide a ser usado como origem da reamostragem
+        """
+        levels = list(self.levels)
+        chosen = levels[0]
+        for level in levels[1:]:
+            if level.width < self.image.width * scale or level.height < self.image.height * scale:
+                break
+            chosen = level
+        return chosen
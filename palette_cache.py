@@ -0,0 +1,112 @@
+# file: palette_cache.py
+import hashlib
+import io
+import json
+import sqlite3
+from typing import Optional, Tuple
+
+from PIL import Image
+
+DB_PATH = "image_editor.db"
+
+# Incrementar quando o resultado da análise mudar (invalida o cache antigo)
+PALETTE_ANALYSIS_VERSION = 2
+
+# Quantidade máxima de análises mantidas no cache
+PALETTE_CACHE_MAX_ENTRIES = 200
+
+# Tamanho máximo, em bytes, de todas as análises guardadas no cache
+PALETTE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Maior tamanho em que a imagem quantizada é exibida (e guardada no cache)
+QUANTIZED_PREVIEW_SIZE = (700, 500)
+
+
+def image_content_hash(image: Image.Image, token=None, strip_height: int = 256) -> str:
+    """
+    Hash do conteúdo da imagem (modo, tamanho, paleta e pixels).
+
+    Os pixels são lidos em faixas, para não duplicar uma imagem grande
+    inteira na memória, e o token é verificado entre elas.
+
+    Args:
+        image: Imagem PIL
+        token: Token de cancelamento (opcional)
+        strip_height: Altura de cada faixa em pixels
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"v{PALETTE_ANALYSIS_VERSION}:{image.mode}:{image.width}x{image.height}".encode())
+    if image.mode == "P":
+        digest.update(bytes(image.getpalette() or []))
+    for top in range(0, image.height, strip_height):
+        if token is not None:
+            token.check()
+        digest.update(image.crop((0, top, image.width, min(image.height, top + strip_height))).tobytes())
+    return digest.hexdigest()
+
+
+def load_palette(content_hash: str) -> Optional[Tuple[list, list, Image.Image]]:
+    """
+    Retorna a análise em cache (cores_frequentes, grupos_de_cores, imagem_quantizada), se houver.
+
+    A imagem quantizada vem reduzida a QUANTIZED_PREVIEW_SIZE.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT color_freq, color_clusters, quantized FROM palette_cache WHERE content_hash = ?",
+                (content_hash,))
+    row = cur.fetchone()
+    if row:
+        cur.execute("UPDATE palette_cache SET ultimo_uso = datetime('now', '-3 hours') WHERE content_hash = ?",
+                    (content_hash,))
+        conn.commit()
+    conn.close()
+    if not row:
+        return None
+    color_freq = [tuple(item) for item in json.loads(row[0])]
+    color_clusters = [[tuple(item) for item in cluster] for cluster in json.loads(row[1])]
+    quantized = Image.open(io.BytesIO(row[2]))
+    quantized.load()
+    return color_freq, color_clusters, quantized
+
+
+def save_palette(content_hash: str, color_freq: list, color_clusters: list, quantized: Image.Image):
+    """
+    Grava uma análise no cache, descartando as menos usadas além dos limites.
+
+    Só a prévia da imagem quantizada, no tamanho em que é exibida, é
+    guardada: em resolução total ela ocuparia megabytes por entrada e
+    levaria mais tempo para codificar em PNG do que para quantizar de novo.
+    """
+    preview = quantized.copy()
+    preview.thumbnail(QUANTIZED_PREVIEW_SIZE, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    preview.save(buffer, "PNG")
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO palette_cache (content_hash, color_freq, color_clusters, quantized)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(content_hash) DO UPDATE SET
+            color_freq = excluded.color_freq,
+            color_clusters = excluded.color_clusters,
+            quantized = excluded.quantized,
+            ultimo_uso = datetime('now', '-3 hours')
+    """, (content_hash, json.dumps(color_freq), json.dumps(color_clusters), buffer.getvalue()))
+    # Mantém as mais recentes enquanto couberem nos limites de quantidade e de bytes
+    cur.execute("""
+        DELETE FROM palette_cache WHERE content_hash IN (
+            SELECT content_hash FROM (
+                SELECT content_hash,
+                       ROW_NUMBER() OVER recentes AS posicao,
+                       SUM(length(color_freq) + length(color_clusters) + length(quantized)) OVER recentes AS total
+                FROM palette_cache
+                WINDOW recentes AS (ORDER BY ultimo_uso DESC, rowid DESC)
+            ) WHERE posicao > ? OR total > ?
+        )
+    """, (PALETTE_CACHE_MAX_ENTRIES, PALETTE_CACHE_MAX_BYTES))
+    conn.commit()
+    conn.close()
@@ -67,5 +67,8 @@ THUMB_SHOW_INFO_BOOL = bool(THUMB_SHOW_INFO)
 THUMB_SORT_BY_PATH_BOOL = bool(THUMB_SORT_BY_PATH)
 THUMB_AUTO_SCROLL_BOOL = bool(THUMB_AUTO_SCROLL)
 
+# Filtros em blocos em processos (memória compartilhada) em vez de threads
+FILTER_PROCESS_POOL = prefs.get("filter_process_pool", 0, int)
+
 # Status para debug visual
 print(f"[Miniaturas] Tamanho: {THUMB_SIZE}px")
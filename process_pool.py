@@ -0,0 +1,229 @@
+# file: process_pool.py
+"""
+Pool de processos para filtros que não liberam o GIL.
+
+Os blocos da imagem não são serializados: a imagem de entrada e a de saída
+ficam em blocos de memória compartilhada (multiprocessing.shared_memory) vistos
+como arrays NumPy, e cada tarefa leva só os nomes dos blocos, o formato e as
+coordenadas do seu bloco. Os processos são criados uma vez e ficam ativos,
+com os módulos dos filtros já importados.
+
+Uso sem interface gráfica (lote):
+    python process_pool.py smooth entrada1.png entrada2.png -o saida --value 1.5
+"""
+import argparse
+import atexit
+import importlib
+import os
+import sys
+import threading
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+from PIL import Image
+
+# Módulos importados em cada processo ao iniciar (deixam os workers "aquecidos")
+PRELOAD_MODULES = ("numpy", "PIL.Image", "image_filters")
+
+# Canais por modo suportado na memória compartilhada
+_CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(modules):
+    """Inicializa um processo do pool."""
+    if sys.version_info < (3, 13) and os.name == "posix":
+        # Antes do 3.13, anexar a um bloco o registra no resource_tracker
+        # (compartilhado com o processo principal), que avisaria de vazamento
+        # ou apagaria o bloco; só quem cria o bloco deve registrá-lo.
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+    for name in modules:
+        importlib.import_module(name)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _run_tile(task):
+    """Aplica o filtro a um bloco lido da entrada compartilhada e grava o miolo na saída."""
+    func, in_name, in_shape, out_name, out_shape, out_mode, box, outer = task
+    in_shm, out_shm = _attach(in_name), _attach(out_name)
+    try:
+        source = np.ndarray(in_shape, dtype=np.uint8, buffer=in_shm.buf)
+        target = np.ndarray(out_shape, dtype=np.uint8, buffer=out_shm.buf)
+        x1, y1, x2, y2 = box
+        ox1, oy1, ox2, oy2 = outer
+        # Image.fromarray copia só o bloco; a imagem inteira nunca é serializada
+        result = func(Image.fromarray(source[oy1:oy2, ox1:ox2]))
+        if result.mode != out_mode:
+            result = result.convert(out_mode)
+        inner = np.asarray(result.crop((x1 - ox1, y1 - oy1, x2 - ox1, y2 - oy1)))
+        target[y1:y2, x1:x2] = inner.reshape(target[y1:y2, x1:x2].shape)
+        del source, target
+    finally:
+        in_shm.close()
+        out_shm.close()
+    return box
+
+
+class SharedMemoryPool:
+    """
+    Pool de processos que aplica filtros em blocos via memória compartilhada.
+
+    Tem o mesmo run_tiled de tiled_executor e pode ser passado como executor
+    (ou definido como padrão com tiled_executor.set_default_executor). O filtro
+    precisa ser serializável: uma função de módulo ou um functools.partial
+    de uma, nunca uma lambda.
+    """
+
+    def __init__(self, processes: Optional[int] = None, preload: Iterable[str] = PRELOAD_MODULES):
+        """
+        Args:
+            processes: Número de processos (padrão: número de núcleos)
+            preload: Módulos importados em cada processo ao iniciar
+        """
+        self.processes = processes or os.cpu_count() or 1
+        # spawn: seguro com Tk e threads no processo principal, e igual em todos os sistemas
+        self._pool = get_context("spawn").Pool(self.processes, initializer=_init_worker,
+                                               initargs=(tuple(preload),))
+
+        # Estatísticas
+        self.images = 0
+        self.tiles = 0
+
+    def run_tiled(self, image: Image.Image, func: Callable[[Image.Image], Image.Image], halo: int,
+                  tile_size: int = 512, token=None, out_mode: Optional[str] = None) -> Image.Image:
+        """
+        Aplica um filtro de vizinhança em blocos sobrepostos, nos processos do pool.
+
+        Mesmas regras de tiled_executor.run_tiled (margem halo, resultado
+        idêntico ao da imagem inteira). Imagens em modos sem equivalente direto
+        em array (1, P, ...) são convertidas para L, RGB ou RGBA antes.
+
+        Args:
+            image: Imagem de entrada
+            func: Filtro serializável aplicado a cada bloco (deve preservar o tamanho)
+            halo: Margem em pixels
+            tile_size: Lado do miolo de cada bloco
+            token: Token de cancelamento verificado a cada bloco concluído (opcional)
+            out_mode: Modo da imagem de saída (padrão: o da entrada)
+
+        Returns:
+            Image.Image: Imagem filtrada
+        """
+        width, height = image.size
+        if width <= tile_size and height <= tile_size:
+            result = func(image)
+            return result.convert(out_mode) if out_mode and result.mode != out_mode else result
+        if image.mode not in _CHANNELS:
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else
+                                  "L" if image.mode in ("1", "I", "F", "I;16") else "RGB")
+        out_mode = out_mode or image.mode
+        if out_mode not in _CHANNELS:
+            raise ValueError(f"Modo de saída não suportado na memória compartilhada: {out_mode}")
+
+        source = np.asarray(image)
+        out_shape = (height, width, _CHANNELS[out_mode]) if out_mode != "L" else (height, width)
+        in_shm = shared_memory.SharedMemory(create=True, size=max(1, source.nbytes))
+        out_shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(out_shape))))
+        try:
+            # Única cópia da entrada: da memória do PIL para o bloco compartilhado
+            np.ndarray(source.shape, dtype=np.uint8, buffer=in_shm.buf)[...] = source
+            tasks = []
+            for y in range(0, height, tile_size):
+                for x in range(0, width, tile_size):
+                    box = (x, y, min(width, x + tile_size), min(height, y + tile_size))
+                    outer = (max(0, box[0] - halo), max(0, box[1] - halo),
+                             min(width, box[2] + halo), min(height, box[3] + halo))
+                    tasks.append((func, in_shm.name, source.shape, out_shm.name, out_shape, out_mode, box, outer))
+
+            for _ in self._pool.imap_unordered(_run_tile, tasks):
+                self.tiles += 1
+                if token is not None:
+                    # Os blocos restantes ainda rodam, mas o resultado é descartado
+                    token.check()
+
+            output = np.ndarray(out_shape, dtype=np.uint8, buffer=out_shm.buf)
+            result = Image.fromarray(output.copy())
+            del output
+            self.images += 1
+            return result
+        finally:
+            for shm in (in_shm, out_shm):
+                shm.close()
+                shm.unlink()
+
+    def map(self, func: Callable[[Image.Image], Image.Image], images: Iterable[Image.Image],
+            halo: int = 0, tile_size: int = 512) -> list:
+        """Aplica o filtro a várias imagens (lote), cada uma em blocos nos processos do pool."""
+        return [self.run_tiled(image, func, halo, tile_size) for image in images]
+
+    def close(self):
+        """Encerra os processos do pool."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do pool."""
+        return {"processes": self.processes, "images": self.images, "tiles": self.tiles}
+
+
+def get_process_pool() -> SharedMemoryPool:
+    """Pool de processos compartilhado, criado no primeiro uso e encerrado na saída."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SharedMemoryPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def _batch_main():
+    import image_filters
+    from tiled_executor import set_default_executor
+
+    parser = argparse.ArgumentParser(description="Aplica um filtro a imagens em lote usando o pool de processos")
+    parser.add_argument("filter", help="Nome do filtro (ex.: smooth, enhance, sepia)")
+    parser.add_argument("paths", nargs="+", help="Imagens de entrada")
+    parser.add_argument("-o", "--output", required=True, help="Pasta de saída")
+    parser.add_argument("--value", type=float, help="Intensidade do filtro, quando houver")
+    parser.add_argument("--processes", type=int, help="Número de processos")
+    args = parser.parse_args()
+
+    func = getattr(image_filters, f"apply_{args.filter}", None)
+    if func is None:
+        parser.error(f"Filtro desconhecido: {args.filter}")
+    os.makedirs(args.output, exist_ok=True)
+
+    with SharedMemoryPool(args.processes) as pool:
+        # Os filtros em blocos (suavização, realce) passam a usar os processos
+        set_default_executor(pool)
+        try:
+            for path in args.paths:
+                with Image.open(path) as image:
+                    image.load()
+                    result = func(image, args.value) if args.value is not None else func(image)
+                target = os.path.join(args.output, os.path.basename(path))
+                result.save(target)
+                print(f"{path} -> {target}")
+        finally:
+            set_default_executor(None)
+        print(pool.stats())
+
+
+if __name__ == "__main__":
+    _batch_main()
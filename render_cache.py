@@ -0,0 +1,82 @@
+# file: render_cache.py
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from PIL import Image
+
+
+class RenderCache:
+    """
+    Cache LRU de bitmaps já renderizados, limitado por memória.
+
+    A chave usada pelo editor é (geração da imagem, zoom, modo de ajuste,
+    tamanho do canvas, ...), de forma que voltar a um zoom ou tamanho de
+    janela já visto reaproveita o bitmap sem reamostrar.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Orçamento de memória do cache em bytes
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def estimate_size(image: Image.Image) -> int:
+        """Estima a memória ocupada por um bitmap PIL."""
+        return image.width * image.height * max(1, len(image.getbands()))
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        """Retorna o bitmap da chave (marcando-o como recente) ou None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, image: Image.Image):
+        """Armazena um bitmap, descartando os menos usados até caber no orçamento."""
+        size = self.estimate_size(image)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (image, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def discard_generation(self, generation: int):
+        """Remove as entradas de uma geração de imagem que não existe mais."""
+        for key in [k for k in self._entries if k[0] == generation]:
+            self.current_bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        """Esvazia o cache (as estatísticas são mantidas)."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do cache para ajuste do orçamento."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
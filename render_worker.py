@@ -0,0 +1,125 @@
+# file: render_worker.py
+import queue
+import threading
+from typing import Callable
+
+from PIL import Image
+
+
+class RenderWorker:
+    """
+    Thread dedicada à reamostragem dos bitmaps exibidos.
+
+    O trabalho pesado (reamostragem PIL) roda fora da thread do Tk; a thread
+    principal apenas recebe o bitmap pronto e o coloca no canvas. Há um único
+    pedido pendente: um novo pedido substitui o anterior, e resultados de
+    pedidos antigos são descartados pelo contador de geração.
+    """
+
+    def __init__(self, widget, poll_interval: int = 10):
+        """
+        Args:
+            widget: Widget Tk usado para entregar os resultados na thread principal
+            poll_interval: Intervalo em ms entre verificações de resultados prontos
+        """
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._results = queue.Queue()
+        self._polling = False
+
+        # Estatísticas
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+        self.discarded = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, render: Callable[[], Image.Image], on_done: Callable[[Image.Image], None]) -> int:
+        """
+        Agenda uma renderização, substituindo a que ainda estiver na fila.
+
+        Args:
+            render: Função executada na thread de fundo que devolve o bitmap
+            on_done: Função chamada na thread principal com o bitmap pronto
+
+        Returns:
+            int: Geração do pedido
+        """
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = (self.generation, render, on_done)
+            self.submitted += 1
+            self._condition.notify()
+            generation = self.generation
+        self._ensure_polling()
+        return generation
+
+    def cancel(self):
+        """Invalida o pedido pendente e o que estiver em execução."""
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self._pending = None
+                self.superseded += 1
+
+    @property
+    def is_busy(self) -> bool:
+        return self._busy or self._pending is not None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                generation, render, on_done = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                result, error = render(), None
+            except Exception as e:
+                result, error = None, e
+            self._results.put((generation, result, on_done, error))
+            with self._condition:
+                self._busy = False
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Entrega na thread principal os resultados que ainda são atuais."""
+        while True:
+            try:
+                generation, result, on_done, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                print(f"Erro na renderização em segundo plano: {error}")
+            elif generation != self.generation:
+                self.discarded += 1
+            else:
+                self.completed += 1
+                on_done(result)
+
+        if self.is_busy or not self._results.empty():
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do worker."""
+        return {
+            "submitted": self.submitted,
+            "superseded": self.superseded,
+            "completed": self.completed,
+            "discarded": self.discarded,
+        }
@@ -0,0 +1,177 @@
+# file: tile_renderer.py
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from image_processor import ImageProcessor
+
+
+class TileRenderer:
+    """
+    Renderiza a imagem exibida em blocos de tamanho fixo no canvas.
+
+    Cada bloco é um item próprio do canvas com um PhotoImage em cache. Ao
+    mover a imagem, apenas os blocos que entram na área visível são criados;
+    os que continuam visíveis são só reposicionados e os que saem são
+    removidos do canvas (o PhotoImage fica em um cache LRU limitado).
+    """
+
+    def __init__(self, canvas, tile_size: int = 256, max_tiles: int = 256):
+        """
+        Args:
+            canvas: Canvas Tk onde os blocos são desenhados
+            tile_size: Lado de cada bloco em pixels de tela
+            max_tiles: Número máximo de PhotoImages mantidos em cache
+        """
+        self.canvas = canvas
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self._items = {}  # (tx, ty) -> id do item no canvas
+        self._item_keys = {}  # (tx, ty) -> chave do PhotoImage exibido
+        self._photos = OrderedDict()  # chave -> PhotoImage
+        self.tiles_rendered = 0
+        self.tiles_reused = 0
+
+    def render(self, source: Image.Image, generation: int, display_size: Tuple[int, int],
+               origin: Tuple[float, float], canvas_size: Tuple[int, int],
+               resample: int = Image.Resampling.LANCZOS, quality: str = "final",
+               deferred: bool = False) -> List[Tuple[int, int]]:
+        """
+        Desenha os blocos visíveis da imagem exibida.
+
+        Args:
+            source: Imagem (ou nível da pirâmide) de onde os blocos são reamostrados
+            generation: Geração da imagem carregada (invalida blocos antigos)
+            display_size: Tamanho da imagem exibida (width, height)
+            origin: Posição do canto superior esquerdo da imagem no canvas
+            canvas_size: Dimensões do canvas (width, height)
+            resample: Filtro de reamostragem dos blocos novos
+            quality: Rótulo da qualidade ("final" ou "preview"), parte da chave do cache
+            deferred: Se True, blocos finais ausentes são desenhados como prévia e
+                devolvidos para serem renderizados fora da thread principal
+
+        Returns:
+            List[Tuple[int, int]]: Blocos que ainda precisam da versão final
+        """
+        display_width, display_height = display_size
+        image_center = (origin[0] + display_width / 2, origin[1] + display_height / 2)
+        region = ImageProcessor.calculate_visible_region(display_size, canvas_size, image_center)
+
+        visible = set()
+        if region is not None:
+            x1, y1, x2, y2 = region
+            size = self.tile_size
+            for ty in range(y1 // size, (y2 - 1) // size + 1):
+                for tx in range(x1 // size, (x2 - 1) // size + 1):
+                    visible.add((tx, ty))
+
+        # Remove do canvas os blocos que saíram da área visível
+        for tile in [t for t in self._items if t not in visible]:
+            self.canvas.delete(self._items.pop(tile))
+            self._item_keys.pop(tile, None)
+
+        missing = []
+        for tile in sorted(visible):
+            tx, ty = tile
+            key = (generation, display_size, tx, ty, quality)
+            tile_resample = resample
+            final_key = (generation, display_size, tx, ty, "final")
+            if final_key in self._photos:
+                key = final_key
+            elif deferred and quality == "final":
+                # A versão final será entregue depois; por ora, uma prévia rápida
+                missing.append(tile)
+                key = (generation, display_size, tx, ty, "preview")
+                tile_resample = ImageProcessor.get_preview_resample(display_size[0] / source.width)
+            photo = self._photos.get(key)
+            if photo is None:
+                photo = self._render_tile(source, display_size, tile, tile_resample)
+                self._photos[key] = photo
+                self.tiles_rendered += 1
+            else:
+                self._photos.move_to_end(key)
+                self.tiles_reused += 1
+
+            x = origin[0] + tx * self.tile_size
+            y = origin[1] + ty * self.tile_size
+            item = self._items.get(tile)
+            if item is None:
+                self._items[tile] = self.canvas.create_image(
+                    x, y, image=photo, anchor="nw", tags=("image", "tile")
+                )
+            else:
+                self.canvas.coords(item, x, y)
+                if self._item_keys.get(tile) != key:
+                    self.canvas.itemconfig(item, image=photo)
+            self._item_keys[tile] = key
+
+        self._evict(set(self._item_keys.values()))
+        return missing
+
+    def render_tile_images(self, source: Image.Image, display_size: Tuple[int, int],
+                           tiles: List[Tuple[int, int]],
+                           resample: int = Image.Resampling.LANCZOS) -> Dict[Tuple[int, int], Image.Image]:
+        """Reamostra blocos como imagens PIL (não usa o Tk; pode rodar em outra thread)."""
+        return {tile: self._render_tile_image(source, display_size, tile, resample) for tile in tiles}
+
+    def apply_tile_images(self, generation: int, display_size: Tuple[int, int],
+                          images: Dict[Tuple[int, int], Image.Image]):
+        """Converte blocos finais prontos e troca as prévias que ainda estão no canvas."""
+        for tile, tile_image in images.items():
+            key = (generation, display_size, tile[0], tile[1], "final")
+            photo = ImageProcessor.convert_to_photoimage(tile_image)
+            self._photos[key] = photo
+            self.tiles_rendered += 1
+            current = self._item_keys.get(tile)
+            if current is not None and current[:2] == (generation, display_size):
+                self.canvas.itemconfig(self._items[tile], image=photo)
+                self._item_keys[tile] = key
+        self._evict(set(self._item_keys.values()))
+
+    def _render_tile_image(self, source, display_size, tile, resample):
+        tx, ty = tile
+        size = self.tile_size
+        box = (
+            tx * size, ty * size,
+            min(display_size[0], (tx + 1) * size), min(display_size[1], (ty + 1) * size)
+        )
+        return ImageProcessor.render_region(source, display_size, box, resample)
+
+    def _render_tile(self, source, display_size, tile, resample):
+        return ImageProcessor.convert_to_photoimage(
+            self._render_tile_image(source, display_size, tile, resample)
+        )
+
+    def _evict(self, in_use):
+        """Descarta os PhotoImages menos usados que não estão no canvas."""
+        for key in list(self._photos):
+            if len(self._photos) <= self.max_tiles:
+                break
+            if key not in in_use:
+                del self._photos[key]
+
+    def remove_items(self):
+        """Remove os blocos do canvas, mantendo o cache de PhotoImages."""
+        for item in self._items.values():
+            self.canvas.delete(item)
+        self.reset_items()
+
+    def reset_items(self):
+        """Esquece os itens do canvas (chamado quando o canvas foi limpo por fora)."""
+        self._items.clear()
+        self._item_keys.clear()
+
+    def clear(self):
+        """Remove os blocos do canvas e esvazia o cache."""
+        self.remove_items()
+        self._photos.clear()
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas do renderizador em blocos."""
+        return {
+            "tiles_on_canvas": len(self._items),
+            "cached_tiles": len(self._photos),
+            "tiles_rendered": self.tiles_rendered,
+            "tiles_reused": self.tiles_reused,
+        }
@@ -0,0 +1,90 @@
+# file: tiled_executor.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from PIL import Image
+
+_executor = None
+_executor_lock = threading.Lock()
+_default_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de threads compartilhado (um worker por núcleo)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="tile")
+        return _executor
+
+
+def set_default_executor(executor=None):
+    """
+    Define o executor usado por run_tiled quando nenhum é informado.
+
+    Aceita um executor concurrent.futures ou um objeto com o próprio
+    run_tiled (ex.: process_pool.SharedMemoryPool); None volta ao pool de
+    threads compartilhado.
+    """
+    global _default_executor
+    _default_executor = executor
+
+
+def run_tiled(image: Image.Image, func: Callable[[Image.Image], Image.Image], halo: int,
+              tile_size: int = 512, executor=None, token=None) -> Image.Image:
+    """
+    Aplica um filtro de vizinhança em blocos sobrepostos, em paralelo.
+
+    Cada bloco é recortado com uma margem (halo) igual ao raio do kernel, para
+    que os pixels da borda do bloco vejam os mesmos vizinhos que veriam na
+    imagem inteira; só o miolo de cada resultado é colado na saída, então a
+    emenda não aparece. Nas bordas da imagem o bloco termina junto com ela e
+    o filtro usa a mesma regra de borda da imagem inteira.
+
+    Só vale para filtros cujo resultado em um pixel depende apenas de
+    vizinhos até a distância halo (nada de estatísticas da imagem inteira).
+    O OpenCV e a maior parte do PIL liberam o GIL, então threads bastam;
+    para filtros que não liberam, use um process_pool.SharedMemoryPool como
+    executor (o filtro precisa então ser serializável).
+
+    Args:
+        image: Imagem de entrada
+        func: Filtro aplicado a cada bloco (deve preservar o tamanho)
+        halo: Margem em pixels (raio do kernel; somar os raios de filtros encadeados)
+        tile_size: Lado do miolo de cada bloco
+        executor: Executor concurrent.futures ou pool com run_tiled (padrão: o definido
+            em set_default_executor ou o pool de threads compartilhado)
+        token: Token de cancelamento verificado antes de cada bloco (opcional)
+
+    Returns:
+        Image.Image: Imagem filtrada, idêntica à aplicação do filtro na imagem inteira
+    """
+    width, height = image.size
+    if width <= tile_size and height <= tile_size:
+        return func(image)
+    executor = executor or _default_executor or get_executor()
+    if hasattr(executor, "run_tiled"):
+        return executor.run_tiled(image, func, halo, tile_size, token=token)
+
+    def process(box):
+        if token is not None:
+            token.check()
+        x1, y1, x2, y2 = box
+        outer = (max(0, x1 - halo), max(0, y1 - halo), min(width, x2 + halo), min(height, y2 + halo))
+        result = func(image.crop(outer))
+        inner = (x1 - outer[0], y1 - outer[1], x2 - outer[0], y2 - outer[1])
+        return box, result.crop(inner)
+
+    boxes = [
+        (x, y, min(width, x + tile_size), min(height, y + tile_size))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+    output: Optional[Image.Image] = None
+    for box, tile in executor.map(process, boxes):
+        if output is None:
+            output = Image.new(tile.mode, image.size)
+        output.paste(tile, box[:2])
+    return output